@@ -0,0 +1,447 @@
+"""
+Ambience Benchmark - Standalone
+
+Cloud_Keeper
+
+Measures what each of the ambience variants costs per ambience interval so we
+can pick the one that scales for our world size. Runs outside of Evennia:
+
+    python 1_testing/ambience_benchmark.py --rooms 2000 --chars 300 --objs 4000
+
+The real typeclasses from ambience_room_dict, ambience_room_list,
+ambience_script_dict and ambience_script_list are imported against minimal
+stand-ins for the handful of Evennia names they use. Rooms, characters and
+ambient objects are held in plain Python lists, msg_contents() only counts
+what would have been sent and sessions are a simple count. Monitors are
+real: saving a monitored Attribute calls its callback, as in Evennia.
+
+Each variant is also run as it was before the ambience handler, from the
+copies in 1_testing/ambience_baseline, reported as "baseline". The baseline
+rooms subscribe to the TICKER_HANDLER stand-in, which fires every
+subscription once per interval. Database writes made by the baseline, like
+the stored messages it extends on every fire, are not counted.
+
+For every strategy a world of N rooms, M puppeted characters and K ambient
+objects is built and then run for a number of intervals on a simulated
+clock. A fraction of characters move between rooms every interval so the
+cost of invalidating pools is included. Reported per interval:
+
+    cpu ms      - Process CPU time spent firing (and moving).
+    peak KiB    - Peak memory allocated while firing, from tracemalloc.
+    sends       - msg_contents() and msg() calls made by the ambience.
+    deliveries  - Messages that reached a puppeted character.
+
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+import types
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -----------------------------------------------------------------------------
+# Evennia Stand-ins
+# -----------------------------------------------------------------------------
+
+
+class STATS(object):
+    """Counters shared by the stand-ins."""
+    sends = 0
+    deliveries = 0
+
+
+class SimClock(object):
+    """Replaces the time module of the ambience modules."""
+    now = 1000000.0
+    gmtime = staticmethod(time.gmtime)
+
+    @classmethod
+    def time(cls):
+        return cls.now
+
+
+class AttributeStub(object):
+    """
+    Attribute handler returning None for anything unset, like db/ndb. If it
+    has an owner, saving an Attribute triggers the owner's monitors.
+    """
+
+    def __init__(self, owner=None):
+        object.__setattr__(self, "_owner", owner)
+
+    def __getattr__(self, name):
+        return None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if self._owner is not None:
+            MONITOR.at_update(self._owner, name)
+
+
+class SessionsStub(object):
+    """The sessions handler of a puppet."""
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def count(self):
+        return 1 if self.obj.has_account else 0
+
+
+class ObjectStub(object):
+    """Stand-in for DefaultObject."""
+    _ids = itertools.count(1)
+
+    def __init__(self, key):
+        self.id = next(self._ids)
+        self.key = key
+        self.db = AttributeStub(self)
+        self.ndb = AttributeStub()
+        self.location = None
+        self.contents = []
+        self.has_account = False
+        self.sessions = SessionsStub(self)
+        self.at_object_creation()
+        self.at_init()
+
+    def __repr__(self):
+        return "%s(#%i)" % (self.key, self.id)
+
+    def contents_get(self):
+        return list(self.contents)
+
+    def msg_contents(self, text=None, exclude=None, **kwargs):
+        STATS.sends += 1
+        for obj in self.contents:
+            if obj.has_account:
+                STATS.deliveries += 1
+
+    def msg(self, text=None, **kwargs):
+        STATS.sends += 1
+        if self.has_account:
+            STATS.deliveries += 1
+
+    def move_to(self, destination):
+        source = self.location
+        if source is not None:
+            source.at_object_leave(self, destination)
+            source.contents.remove(self)
+        self.location = destination
+        destination.contents.append(self)
+        destination.at_object_receive(self, source)
+        self.at_after_move(source)
+
+    def at_object_creation(self):
+        pass
+
+    def at_init(self):
+        pass
+
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        pass
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        pass
+
+    def at_after_move(self, source_location, **kwargs):
+        pass
+
+    def at_post_puppet(self, **kwargs):
+        pass
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        pass
+
+
+class CharacterStub(ObjectStub):
+    """Stand-in for DefaultCharacter."""
+
+
+class RoomStub(ObjectStub):
+    """Stand-in for DefaultRoom."""
+
+
+class ScriptStub(object):
+    """Stand-in for DefaultScript."""
+
+    def __init__(self):
+        self.db = AttributeStub()
+        self.ndb = AttributeStub()
+        self.at_script_creation()
+        self.at_start()
+
+    def at_script_creation(self):
+        pass
+
+    def at_start(self):
+        pass
+
+
+class SessionStub(object):
+    """A session puppeting a character, as found in SESSIONS."""
+
+    def __init__(self, puppet):
+        self.puppet = puppet
+
+
+class TickerStub(object):
+    """
+    Stand-in for TICKER_HANDLER. Subscriptions are kept and fired by
+    the benchmark once per interval.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+
+    def add(self, interval=60, callback=None, idstring="", persistent=True,
+            *args, **kwargs):
+        self.subscriptions[(interval, callback, idstring)] = callback
+
+    def remove(self, interval=60, callback=None, idstring="", *args,
+               **kwargs):
+        self.subscriptions.pop((interval, callback, idstring), None)
+
+    def fire(self):
+        for callback in list(self.subscriptions.values()):
+            callback()
+
+
+TICKER = TickerStub()
+SESSIONS = {}
+
+
+class MonitorStub(object):
+    """
+    Stand-in for MONITOR_HANDLER. Like Evennia it only accepts plain
+    functions as callbacks and calls them when a monitored Attribute of
+    the object is saved.
+    """
+
+    def __init__(self):
+        self.monitors = {}
+
+    def add(self, obj, fieldname, callback, idstring="", persistent=False,
+            **kwargs):
+        if not inspect.isfunction(callback):
+            raise TypeError("Invalid monitor definition: %r is not a "
+                            "function." % callback)
+        monitors = self.monitors.setdefault((obj, fieldname), {})
+        monitors[idstring] = (callback, kwargs)
+
+    def remove(self, obj, fieldname, idstring=""):
+        self.monitors.get((obj, fieldname), {}).pop(idstring, None)
+
+    def at_update(self, obj, fieldname):
+        for callback, kwargs in list(self.monitors.get((obj, fieldname),
+                                                       {}).values()):
+            callback(obj=obj, fieldname=fieldname, **kwargs)
+
+
+MONITOR = MonitorStub()
+
+
+def install_stubs():
+    """
+    Register the stand-ins as the evennia modules the variants import and
+    point the ambience modules at the simulated clock.
+    """
+    evennia = types.ModuleType("evennia")
+    evennia.DefaultObject = ObjectStub
+    evennia.DefaultCharacter = CharacterStub
+    evennia.DefaultRoom = RoomStub
+    evennia.DefaultScript = ScriptStub
+    evennia.TICKER_HANDLER = TICKER
+    evennia.MONITOR_HANDLER = MONITOR
+
+    server = types.ModuleType("evennia.server")
+    sessionhandler = types.ModuleType("evennia.server.sessionhandler")
+    sessionhandler.SESSIONS = SESSIONS
+    utils = types.ModuleType("evennia.utils")
+    gametime = types.ModuleType("evennia.utils.gametime")
+    gametime.gametime = lambda absolute=False: SimClock.now
+
+    sys.modules.update({"evennia": evennia,
+                        "evennia.server": server,
+                        "evennia.server.sessionhandler": sessionhandler,
+                        "evennia.utils": utils,
+                        "evennia.utils.gametime": gametime})
+
+    if GAME_DIR not in sys.path:
+        sys.path.insert(0, GAME_DIR)
+
+# -----------------------------------------------------------------------------
+# Strategies
+# -----------------------------------------------------------------------------
+
+
+class Strategy(object):
+    """
+    Builds a world from one of the variant modules and runs one ambience
+    interval at a time.
+    """
+    period = 30
+
+    def __init__(self, name, module, script=None, ticker=False):
+        self.name = name
+        self.module = importlib.import_module("1_testing." + module)
+        self.module.time = SimClock
+        self.script_class = script
+        self.ticker = ticker
+        self.listed = module.endswith("_list")
+
+    def ambient_msgs(self, key, count):
+        """Returns count messages in the storage format of the variant."""
+        msgs = ["%s ambience %i." % (key, i) for i in range(count)]
+        if self.listed:
+            return msgs
+        return dict((msg, random.randint(1, 5)) for msg in msgs)
+
+    def build(self, rooms, chars, objs, msgs):
+        """Create the world and puppet the characters into it."""
+        handler = importlib.import_module("1_testing.ambience_handler")
+        occupancy = importlib.import_module("features.occupancy")
+        handler.time = SimClock
+        handler.AMBIENT_POOLS.__init__()
+        handler.AMBIENT_LISTENERS.__init__()
+        handler.AMBIENCE_SCHEDULER.__init__()
+        handler.AMBIENCE_SLOTS.__init__()
+        handler.AMBIENCE_SCHEDULER._start = lambda: None
+        handler.AMBIENT_LISTENERS._start = lambda: None
+        occupancy.OCCUPANCY.clear()
+        TICKER.__init__()
+        SESSIONS.clear()
+
+        module = self.module
+        self.rooms = [module.AmbientRoom("room%i" % i) for i in range(rooms)]
+        for room in self.rooms:
+            room.db.ambient_msgs = self.ambient_msgs(room.key, msgs)
+            room.db.ambient_interval = self.period
+        for i in range(objs):
+            obj = module.AmbientObj("obj%i" % i)
+            obj.db.ambient_msgs = self.ambient_msgs(obj.key, msgs)
+            obj.move_to(random.choice(self.rooms))
+        self.chars = []
+        for i in range(chars):
+            char = module.AmbientChararacter("char%i" % i)
+            char.db.ambient_msgs = self.ambient_msgs(char.key, 1)
+            char.has_account = True
+            char.move_to(random.choice(self.rooms))
+            char.at_post_puppet()
+            SESSIONS[i + 1] = SessionStub(char)
+            self.chars.append(char)
+
+        self.script = self.script_class() if self.script_class else None
+        self.scheduler = handler.AMBIENCE_SCHEDULER
+        self.listeners = handler.AMBIENT_LISTENERS
+        if self.script:
+            self.script.db.period = self.period
+
+    def move(self, fraction):
+        """Move a fraction of the characters to a random room."""
+        for char in random.sample(self.chars, int(len(self.chars) * fraction)):
+            char.move_to(random.choice(self.rooms))
+
+    def run_interval(self):
+        """
+        Advance the simulated clock by one ambience period a second at a
+        time, flushing digests every second as their own loop would.
+        """
+        script = self.script
+        for second in range(1, self.period + 1):
+            SimClock.now += 1
+            if self.ticker:
+                if second == self.period:
+                    TICKER.fire()
+            elif script is None:
+                self.scheduler.tick()
+            elif not second % script.interval:
+                script.at_repeat()
+            self.listeners.flush()
+
+
+def strategies():
+    """Returns every strategy to benchmark."""
+    found = []
+    for module in ("ambience_room_dict", "ambience_room_list"):
+        found.append(Strategy("baseline " + module,
+                              "ambience_baseline." + module, ticker=True))
+        found.append(Strategy(module, module))
+    for module in ("ambience_script_dict", "ambience_script_list"):
+        baseline = importlib.import_module("1_testing.ambience_baseline."
+                                           + module)
+        found.append(Strategy("baseline " + module,
+                              "ambience_baseline." + module,
+                              baseline.AmbientScript))
+        mod = importlib.import_module("1_testing." + module)
+        found.append(Strategy(module, module, mod.AmbientScript))
+        found.append(Strategy(module + " (staggered)", module,
+                              mod.StaggeredAmbientScript))
+    return found
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+
+
+def benchmark(strategy, args):
+    """
+    Runs one strategy and returns its per interval averages.
+    """
+    random.seed(args.seed)
+    strategy.build(args.rooms, args.chars, args.objs, args.msgs)
+    # Warm up the caches before measuring.
+    strategy.run_interval()
+
+    STATS.sends = STATS.deliveries = 0
+    start = time.process_time()
+    for _ in range(args.intervals):
+        strategy.move(args.moves)
+        strategy.run_interval()
+    cpu = time.process_time() - start
+    sends, deliveries = STATS.sends, STATS.deliveries
+
+    # Tracing slows everything down, so allocations get their own interval.
+    tracemalloc.start()
+    strategy.move(args.moves)
+    strategy.run_interval()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    intervals = float(args.intervals)
+    return (cpu * 1000 / intervals, peak / 1024.0,
+            sends / intervals, deliveries / intervals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--chars", type=int, default=200)
+    parser.add_argument("--objs", type=int, default=2000)
+    parser.add_argument("--msgs", type=int, default=5,
+                        help="ambient messages per room and object")
+    parser.add_argument("--moves", type=float, default=0.1,
+                        help="fraction of characters moving each interval")
+    parser.add_argument("--intervals", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    install_stubs()
+    print("%i rooms, %i characters, %i ambient objects, %i intervals"
+          % (args.rooms, args.chars, args.objs, args.intervals))
+    row = "%-34s %10s %10s %10s %11s"
+    print(row % ("strategy", "cpu ms", "peak KiB", "sends", "deliveries"))
+    for strategy in strategies():
+        cpu, peak, sends, deliveries = benchmark(strategy, args)
+        print(row % (strategy.name, "%.2f" % cpu, "%.1f" % peak,
+                     "%.0f" % sends, "%.0f" % deliveries))
+
+
+if __name__ == "__main__":
+    main()
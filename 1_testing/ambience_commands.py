@@ -0,0 +1,50 @@
+"""
+Ambience Commands - TO BE TESTED
+
+Cloud_Keeper
+
+Player commands for the ambience system. Works with all of the ambience
+variants as they share the AMBIENT_LISTENERS budgets.
+
+Add CmdAmbience to the CharacterCmdSet in commands/default_cmdsets.py.
+"""
+from evennia.utils.utils import class_from_module
+from django.conf import settings
+from .ambience_handler import AMBIENT_LISTENERS, AMBIENCE_VERBOSITY
+COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
+
+
+class CmdAmbience(COMMAND_DEFAULT_CLASS):
+    """
+    Set how much ambience you see.
+
+    Usage:
+        ambience [off||low||normal||high]
+
+    Ambient messages beyond what your verbosity allows are collected and
+    shown together in a single line later on. With no argument shows your
+    current verbosity.
+    """
+    key = "ambience"
+    locks = "cmd:all()"
+    help_category = "General"
+
+    def func(self):
+        """Actions undertaken by the Command"""
+        caller = self.caller
+        verbosity = self.args.strip().lower()
+        options = "||".join(AMBIENCE_VERBOSITY)
+
+        # No argument: show current verbosity.
+        if not verbosity:
+            current = AMBIENT_LISTENERS.budget(caller).verbosity
+            caller.msg("Your ambience is set to %s. Usage: ambience [%s]"
+                       % (current, options))
+            return
+
+        if verbosity not in AMBIENCE_VERBOSITY:
+            caller.msg("Usage: ambience [%s]" % options)
+            return
+
+        AMBIENT_LISTENERS.set_verbosity(caller, verbosity)
+        caller.msg("Your ambience is now set to %s." % verbosity)
@@ -0,0 +1,888 @@
+"""
+Ambience Handler - TO BE TESTED
+
+Cloud_Keeper
+
+A single scheduler that drives the ambient messages of every occupied
+AmbientRoom, replacing one TICKER_HANDLER subscription per room.
+
+Occupied rooms are bucketed by the tick they are next due to fire in. The
+scheduler ticks once a second and fires the whole batch of due rooms in that
+reactor tick before moving them on to their next tick. Rooms are added and
+removed as they become inhabited or empty, and nothing is written to the
+database when objects move - the schedule lives purely in memory.
+
+Usage:
+    from .ambience_handler import AMBIENCE_SCHEDULER
+
+    AMBIENCE_SCHEDULER.add(room, interval)  # Start firing room.
+    AMBIENCE_SCHEDULER.remove(room)         # Stop firing room.
+
+The scheduled object needs a display_ambient_msg(msg) method and a
+return_ambient_msgs() method to build its pool from.
+
+Nothing about the schedule is persisted. When the server starts,
+OCCUPANCY.rebuild() is called from at_server_start and calls
+at_room_inhabited() on every room with a puppeted character in it, which
+schedules the room again. A cold start has no puppets and touches no rooms,
+and stale per-room flags or ticker subscriptions are never read.
+
+Ambient message pools are aggregated once per room and held in memory by
+AMBIENT_POOLS. A room's pool is only rebuilt after it has been invalidated,
+which happens when the room's contents change or when the ambient_msgs or
+ambient_switch Attribute of the room or anything inside it changes.
+
+    pool = AMBIENT_POOLS.get(room)   # Cached AmbientPool, built on demand.
+    pool.sample()                    # Random weighted message or None.
+    sample_batch(pools)              # One message per pool.
+    AMBIENT_POOLS.invalidate(obj)    # Drop pools of obj and its locations.
+
+Rooms are staggered across their interval by a deterministic per-room phase
+offset, so rooms don't all fire on the same boundary. Ticks missed by a late
+tick are caught up on the next one, and no more than
+AMBIENCE_MAX_SENDS_PER_TICK messages are sent in one tick. Rooms over the
+limit are carried over to the following tick.
+
+The staggered ambience scripts tick AMBIENCE_SLOTS themselves instead, which
+schedules rooms the same way without a reactor loop of its own.
+
+    AMBIENCE_SLOTS.add(room)         # Room became inhabited.
+    AMBIENCE_SLOTS.remove(room)      # Room became empty.
+    AMBIENCE_SLOTS.send(AMBIENCE_SLOTS.due(now))  # Fire rooms due since.
+
+Messages can be limited to a time of day, season or weather by giving them
+conditions instead of a plain weight:
+
+    {"The owls hoot.": {"weight": 2, "time": "night"},
+     "Rain drums on the roof.": {"weather": ["rain", "storm"]},
+     "The sun shines brightly": 1}
+
+    # Or in the list versions.
+    ["The sun shines brightly", ("The owls hoot.", {"time": "night"})]
+
+Time of day and season follow the game clock, weather is set by whatever
+runs your weather. A pool splits into one precomputed pool per condition
+window the first time that window is active, and when the world changes only
+rooms whose pools have conditional messages are swapped to their new window.
+
+    AMBIENT_POOLS.set_conditions(weather="rain")
+
+Each listener has an ambience budget, a token bucket refilled at the rate
+of their chosen verbosity. Lines arriving while the budget is spent are
+held back and sent as a single digest line once a token is available, so a
+crowded room doesn't flood the player or the portal. Digests are flushed by
+a loop of their own, running only while someone is waiting for one, so they
+arrive whichever variant drives the ambience. Budgets are forgotten when a
+character logs off.
+
+    AMBIENT_LISTENERS.msg_contents(room, msg)       # Budgeted room message.
+    AMBIENT_LISTENERS.set_verbosity(char, "low")    # Saved on the character.
+"""
+
+import random
+import time
+import weakref
+
+# Options start here.
+# Seconds between scheduler ticks.
+AMBIENCE_TICK_RATE = 1
+
+# Whether rooms are spread across their interval by a per-room phase offset.
+# When False every room fires a full interval after it becomes occupied.
+AMBIENCE_STAGGER = True
+
+# The maximum number of ambient messages sent to listeners in one tick, or
+# None for unlimited. Rooms over the limit are carried over to the next tick.
+AMBIENCE_MAX_SENDS_PER_TICK = 500
+
+# Fractional part of the golden ratio. Multiplying sequential ids by it
+# spreads them evenly over [0, 1).
+_GOLDEN_FRACTION = 0.6180339887498949
+
+# The conditions messages can be limited by and their starting values.
+AMBIENCE_DEFAULT_CONDITIONS = {"time": "morning",
+                               "season": "spring",
+                               "weather": "clear"}
+
+# The game hour each time of day starts at.
+AMBIENCE_TIMES_OF_DAY = ((0, "night"), (5, "dawn"), (7, "morning"),
+                         (12, "afternoon"), (17, "evening"), (20, "night"))
+
+# The season of each month of the game year.
+AMBIENCE_SEASONS = {12: "winter", 1: "winter", 2: "winter",
+                    3: "spring", 4: "spring", 5: "spring",
+                    6: "summer", 7: "summer", 8: "summer",
+                    9: "autumn", 10: "autumn", 11: "autumn"}
+
+# Seconds between checks of the game clock.
+AMBIENCE_CLOCK_RATE = 60
+
+# Verbosity levels players can choose from, mapped to the seconds it takes to
+# earn another ambient line, or None to receive no ambience at all.
+AMBIENCE_VERBOSITY = {"off": None, "low": 120, "normal": 30, "high": 10}
+
+# The verbosity of players that have not chosen one.
+AMBIENCE_DEFAULT_VERBOSITY = "normal"
+
+# The most ambient lines a listener can receive in a burst.
+AMBIENCE_BURST = 3
+
+# How held back lines are sent once the listener has budget again.
+AMBIENCE_DIGEST_FORMAT = "Meanwhile... %s"
+
+
+def ambience_phase(room, interval):
+    """
+    Returns the deterministic phase offset of room within interval.
+
+    Args:
+        room (Object): The room to return the phase of.
+        interval (int): Seconds between the room's ambient messages.
+
+    Returns:
+        phase (float): Offset in seconds, 0 <= phase < interval.
+    """
+    return (room.id * _GOLDEN_FRACTION) % 1.0 * interval
+
+
+def clock_conditions(gametime):
+    """
+    Returns the time of day and season at a point in game time.
+
+    Args:
+        gametime (float): Absolute game time in seconds.
+
+    Returns:
+        conditions (dict): The "time" and "season" conditions.
+    """
+    clock = time.gmtime(gametime)
+    time_of_day = AMBIENCE_TIMES_OF_DAY[0][1]
+    for hour, name in AMBIENCE_TIMES_OF_DAY:
+        if clock.tm_hour >= hour:
+            time_of_day = name
+    return {"time": time_of_day, "season": AMBIENCE_SEASONS[clock.tm_mon]}
+
+
+def parse_ambient_msgs(ambient_msgs):
+    """
+    Yields (message, weight, conditions) from a dictionary or list of
+    ambient messages. Conditions is None for unconditional messages.
+
+    Args:
+        ambient_msgs (dict or list): Stored ambient messages.
+    """
+    if isinstance(ambient_msgs, dict):
+        entries = ambient_msgs.items()
+    else:
+        entries = ((entry, 1) if isinstance(entry, str) else entry
+                   for entry in ambient_msgs or ())
+    for msg, value in entries:
+        if not hasattr(value, "get"):
+            yield msg, value, None
+            continue
+        conditions = {}
+        for key in AMBIENCE_DEFAULT_CONDITIONS:
+            allowed = value.get(key)
+            if allowed:
+                conditions[key] = ((allowed,) if isinstance(allowed, str)
+                                   else tuple(allowed))
+        yield msg, value.get("weight", 1), conditions or None
+
+
+# -----------------------------------------------------------------------------
+# Ambient Message Pools
+# -----------------------------------------------------------------------------
+
+
+class AmbientPool(object):
+    """
+    A flattened, read-only pool of ambient messages and their weights.
+
+    Built from either a dictionary of {message: weight} or a list of
+    messages, where repeated messages in a list add to their weighting.
+
+    Sampling uses a Vose alias table, built the first time the pool is
+    sampled, so each draw costs O(1) regardless of the size of the pool.
+    """
+
+    def __init__(self, ambient_msgs=None):
+        weighted = {}
+        conditions = {}
+        for msg, weight, msg_conditions in parse_ambient_msgs(ambient_msgs):
+            weighted[msg] = weighted.get(msg, 0) + weight
+            if msg_conditions:
+                conditions[msg] = msg_conditions
+        self.msgs = [msg for msg, weight in weighted.items() if weight > 0]
+        self.weights = [weighted[msg] for msg in self.msgs]
+        self.conditions = conditions
+        self.windows = {}
+        self.prob = None
+        self.alias = None
+
+    @property
+    def conditional(self):
+        """Whether any message in the pool has conditions."""
+        return bool(self.conditions)
+
+    def for_conditions(self, state):
+        """
+        Returns the pool of messages active under state. Each window is
+        computed once and reused whenever it becomes active again.
+
+        Args:
+            state (dict): The current conditions of the world.
+
+        Returns:
+            pool (AmbientPool): self if no messages have conditions.
+        """
+        if not self.conditions:
+            return self
+        key = tuple(state.get(name) for name in AMBIENCE_DEFAULT_CONDITIONS)
+        pool = self.windows.get(key)
+        if pool is None:
+            pool = self.windows[key] = AmbientPool()
+            for msg, weight in zip(self.msgs, self.weights):
+                msg_conditions = self.conditions.get(msg)
+                if msg_conditions and any(state.get(name) not in allowed
+                                          for name, allowed
+                                          in msg_conditions.items()):
+                    continue
+                pool.msgs.append(msg)
+                pool.weights.append(weight)
+        return pool
+
+    def __len__(self):
+        return len(self.msgs)
+
+    def build_alias_table(self):
+        """
+        Build the probability and alias tables with Vose's alias method.
+        """
+        size = len(self.weights)
+        total = float(sum(self.weights))
+        scaled = [weight * size / total for weight in self.weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        # Pair each underfull column with an overfull one.
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Whatever remains is full, up to floating point error.
+        self.prob = prob
+        self.alias = alias
+
+    def sample(self, rand=random.random):
+        """
+        Returns a random message chosen by weight, or None if empty.
+
+        Args:
+            rand (callable, optional): Source of floats in [0, 1).
+        """
+        msgs = self.msgs
+        if not msgs:
+            return None
+        if self.prob is None:
+            self.build_alias_table()
+        # One draw picks the column and the coin toss within it.
+        draw = rand() * len(msgs)
+        column = int(draw)
+        if draw - column < self.prob[column]:
+            return msgs[column]
+        return msgs[self.alias[column]]
+
+
+def sample_batch(pools):
+    """
+    Draw one message from each pool in a single pass.
+
+    Args:
+        pools (list): AmbientPools to draw from.
+
+    Returns:
+        msgs (list): One message (or None for an empty pool) per pool.
+    """
+    rand = random.random
+    return [pool.sample(rand) for pool in pools]
+
+
+class AmbientPoolCache(object):
+    """
+    Holds the aggregated AmbientPool of each room in memory, along with the
+    pre-flattened contribution of each object to its location's pool.
+
+    An object's contribution is whatever its return_ambient_msgs() returns,
+    so a character's contribution already includes its worn equipment. A
+    room's pool is then built from the cached contributions of its contents
+    rather than walking every inventory.
+    """
+
+    def __init__(self):
+        self.pools = {}
+        self.active = {}
+        self.conditional = set()
+        self.contributions = {}
+        self.conditions = dict(AMBIENCE_DEFAULT_CONDITIONS)
+
+    def get(self, room):
+        """
+        Returns the cached pool of room active under the current conditions,
+        building it from the room's return_ambient_msgs() if it has been
+        invalidated.
+
+        Args:
+            room (Object): The room to return the pool of.
+        """
+        pool = self.active.get(room)
+        if pool is None:
+            full = self.pools.get(room)
+            if full is None:
+                full = AmbientPool(room.return_ambient_msgs())
+                self.pools[room] = full
+            if full.conditional:
+                self.conditional.add(room)
+            pool = self.active[room] = full.for_conditions(self.conditions)
+        return pool
+
+    def set_conditions(self, **conditions):
+        """
+        Change the conditions of the world, swapping the active pool of
+        every room with conditional messages to its new window.
+
+        Kwargs:
+            time (str): Time of day.
+            season (str): Season of the year.
+            weather (str): Current weather.
+        """
+        changed = dict((name, value) for name, value in conditions.items()
+                       if self.conditions.get(name) != value)
+        if not changed:
+            return
+        self.conditions.update(changed)
+        pools, active, state = self.pools, self.active, self.conditions
+        for room in self.conditional:
+            active[room] = pools[room].for_conditions(state)
+
+    def update_clock(self):
+        """
+        Set the time of day and season from the game clock.
+        """
+        from evennia.utils import gametime
+        self.set_conditions(**clock_conditions(gametime.gametime(absolute=True)))
+
+    def contribution(self, obj):
+        """
+        Returns the cached ambient messages obj adds to its location,
+        collecting them with obj.return_ambient_msgs() if invalidated.
+
+        Args:
+            obj (Object): The object to return the contribution of.
+
+        Returns:
+            ambient_msgs (dict or list): The messages, or None if obj has no
+                ambient messages. Must not be modified.
+        """
+        try:
+            return self.contributions[obj]
+        except KeyError:
+            pass
+        if hasattr(obj, "return_ambient_msgs"):
+            ambient_msgs = obj.return_ambient_msgs()
+        else:
+            ambient_msgs = None
+        self.contributions[obj] = ambient_msgs
+        return ambient_msgs
+
+    def invalidate(self, obj):
+        """
+        Drop the cached pool and contribution of obj and of every location
+        containing it.
+
+        Args:
+            obj (Object): The object whose ambient messages changed.
+        """
+        while obj is not None:
+            self.pools.pop(obj, None)
+            self.active.pop(obj, None)
+            self.conditional.discard(obj)
+            self.contributions.pop(obj, None)
+            obj = obj.location
+
+    def monitor(self, obj):
+        """
+        Invalidate obj's pools whenever its ambient Attributes are saved.
+
+        Args:
+            obj (Object): The object to monitor.
+        """
+        from evennia import MONITOR_HANDLER
+        for attrname in ("ambient_msgs", "ambient_switch"):
+            MONITOR_HANDLER.add(obj, attrname, _at_ambient_attribute_change,
+                                idstring="ambience", source=obj)
+
+
+def _at_ambient_attribute_change(obj=None, fieldname=None, source=None,
+                                 **kwargs):
+    """
+    MONITOR_HANDLER callback for ambient Attribute changes. The
+    MONITOR_HANDLER only accepts plain functions, not bound methods.
+
+    Args:
+        obj (Attribute): The Attribute that changed.
+        fieldname (str): The field that changed.
+        source (Object): The object the Attribute is stored on.
+    """
+    AMBIENT_POOLS.invalidate(source)
+
+
+# -----------------------------------------------------------------------------
+# Ambient Listeners
+# -----------------------------------------------------------------------------
+
+
+class AmbienceBudget(object):
+    """
+    A token bucket limiting the ambient lines one listener receives, with
+    the lines held back while it is empty.
+    """
+
+    def __init__(self, verbosity=AMBIENCE_DEFAULT_VERBOSITY):
+        self.tokens = AMBIENCE_BURST
+        self.updated = time.time()
+        self.pending = []
+        self.verbosity = verbosity
+
+    def refill(self, now):
+        """Add the tokens earned since the last refill."""
+        rate = AMBIENCE_VERBOSITY.get(self.verbosity)
+        if rate and now > self.updated:
+            earned = (now - self.updated) / rate
+            self.tokens = min(AMBIENCE_BURST, self.tokens + earned)
+        self.updated = now
+
+    def offer(self, msg, now):
+        """
+        Spend a token on msg if one is available, otherwise hold it back.
+
+        Args:
+            msg (str): The ambient line.
+            now (float): The current time.
+
+        Returns:
+            msg (str or None): The line to send now, if any.
+        """
+        if AMBIENCE_VERBOSITY.get(self.verbosity) is None:
+            return None
+        self.refill(now)
+        if self.tokens >= 1 and not self.pending:
+            self.tokens -= 1
+            return msg
+        if msg not in self.pending:
+            self.pending.append(msg)
+        return None
+
+    def flush(self, now):
+        """
+        Returns held back lines as one digest line if a token is available.
+        """
+        if not self.pending:
+            return None
+        self.refill(now)
+        if self.tokens < 1:
+            return None
+        self.tokens -= 1
+        digest = AMBIENCE_DIGEST_FORMAT % " ".join(self.pending)
+        self.pending = []
+        return digest
+
+
+class AmbienceListeners(object):
+    """
+    Holds the AmbienceBudget of each listener in memory. A listener's
+    verbosity is read from their ambience_verbosity Attribute only when
+    their budget is first created.
+    """
+
+    tick_rate = AMBIENCE_TICK_RATE
+
+    def __init__(self):
+        self.budgets = weakref.WeakKeyDictionary()
+        self.waiting = weakref.WeakSet()
+        self.ticker = None
+
+    def budget(self, listener):
+        """Returns the budget of listener, creating it if needed."""
+        budget = self.budgets.get(listener)
+        if budget is None:
+            verbosity = (listener.db.ambience_verbosity
+                         or AMBIENCE_DEFAULT_VERBOSITY)
+            budget = self.budgets[listener] = AmbienceBudget(verbosity)
+        return budget
+
+    def set_verbosity(self, listener, verbosity):
+        """
+        Change and save the ambience verbosity of listener.
+
+        Args:
+            listener (Object): The character choosing a verbosity.
+            verbosity (str): One of AMBIENCE_VERBOSITY.
+        """
+        if verbosity not in AMBIENCE_VERBOSITY:
+            raise ValueError("Unknown ambience verbosity: %s" % verbosity)
+        listener.db.ambience_verbosity = verbosity
+        budget = self.budget(listener)
+        budget.verbosity = verbosity
+        if AMBIENCE_VERBOSITY[verbosity] is None:
+            budget.pending = []
+            self.waiting.discard(listener)
+
+    def msg(self, listener, msg, now=None):
+        """
+        Send an ambient line to listener if their budget allows it.
+
+        Args:
+            listener (Object): The puppeted character to message.
+            msg (str): The ambient line.
+            now (float, optional): The current time.
+
+        Returns:
+            sent (bool): Whether the line was sent now.
+        """
+        budget = self.budget(listener)
+        msg = budget.offer(msg, now or time.time())
+        if msg:
+            listener.msg(msg)
+            return True
+        if budget.pending:
+            self.waiting.add(listener)
+            self._start()
+        return False
+
+    def msg_contents(self, room, msg):
+        """
+        Send an ambient line to every puppeted character in room.
+
+        Args:
+            room (Object): The room displaying the line.
+            msg (str): The ambient line.
+
+        Returns:
+            sent (int): The number of characters the line was sent to.
+        """
+        now = time.time()
+        sent = 0
+        for obj in room.contents:
+            if obj.has_account and self.msg(obj, msg, now):
+                sent += 1
+        return sent
+
+    def flush(self):
+        """
+        Send digests to waiting listeners that have budget again.
+        """
+        now = time.time()
+        for listener in list(self.waiting):
+            budget = self.budgets.get(listener)
+            digest = budget.flush(now) if budget else None
+            if digest:
+                listener.msg(digest)
+            if not budget or not budget.pending:
+                self.waiting.discard(listener)
+        if not self.waiting:
+            self._stop()
+
+    def remove(self, listener):
+        """Forget the budget of a listener, e.g. when they log off."""
+        self.budgets.pop(listener, None)
+        self.waiting.discard(listener)
+
+    def _start(self):
+        """Start the flushing loop if it isn't already running."""
+        if self.ticker is None:
+            from twisted.internet.task import LoopingCall
+            self.ticker = LoopingCall(self.flush)
+            self.ticker.start(self.tick_rate, now=False)
+
+    def _stop(self):
+        """Stop the flushing loop while nobody is waiting."""
+        if self.ticker is not None:
+            if self.ticker.running:
+                self.ticker.stop()
+            self.ticker = None
+
+
+# -----------------------------------------------------------------------------
+# Ambient Scheduler
+# -----------------------------------------------------------------------------
+
+
+class AmbienceSlots(object):
+    """
+    Buckets scheduled rooms by the slot, or tick, they are next due in. Each
+    room is placed on its own phase within its interval and is only touched
+    again when it is due, added or removed, so finding the rooms due in a
+    tick never looks at any other room.
+
+    Due rooms are displayed with display_ambient_msg(), which returns the
+    number of listeners it sent to. Once max_sends messages have been sent in
+    a tick, the rest of the due rooms are carried over to the next tick ahead
+    of the rooms due then.
+    """
+    stagger = AMBIENCE_STAGGER
+    max_sends = AMBIENCE_MAX_SENDS_PER_TICK
+
+    def __init__(self, period=30, slot_length=AMBIENCE_TICK_RATE):
+        self.period = period
+        self.slot_length = slot_length
+        self.slots = {}
+        self.rooms = {}
+        self.backlog = []
+        self.last = None
+
+    def slot_count(self, interval):
+        """Returns the number of slots in interval seconds."""
+        return max(1, int(round(interval / float(self.slot_length))))
+
+    def next_slot(self, room, interval, current):
+        """
+        Returns the first slot after current that room is due in.
+
+        Args:
+            room (Object): The room to schedule.
+            interval (int): Seconds between the room's ambient messages.
+            current (int): The slot of the current time.
+        """
+        count = self.slot_count(interval)
+        if not self.stagger:
+            return current + count
+        phase = int(ambience_phase(room, interval) / self.slot_length) % count
+        return current + 1 + (phase - current - 1) % count
+
+    def configure(self, period, slot_length):
+        """
+        Change the period and slot length, rescheduling every room.
+
+        Args:
+            period (int): Seconds between the ambient messages of rooms added
+                without an interval of their own.
+            slot_length (int): Seconds between ticks.
+        """
+        if (period, slot_length) == (self.period, self.slot_length):
+            return
+        rooms = [(room, interval) for room, (slot, interval)
+                 in self.rooms.items()]
+        self.period, self.slot_length = period, slot_length
+        self.slots, self.rooms, self.backlog, self.last = {}, {}, [], None
+        for room, interval in rooms:
+            self.add(room, interval)
+
+    def add(self, room, interval=None):
+        """
+        Schedule a room to fire every interval seconds. Adding a room that
+        is already scheduled leaves its current schedule untouched.
+
+        Args:
+            room (Object): Object with a display_ambient_msg() method.
+            interval (int, optional): Seconds between ambient messages,
+                defaults to the period.
+        """
+        if room in self.rooms:
+            return
+        current = int(time.time() / self.slot_length)
+        if self.last is not None:
+            current = max(current, self.last)
+        slot = self.next_slot(room, interval or self.period, current)
+        self.rooms[room] = (slot, interval)
+        self.slots.setdefault(slot, set()).add(room)
+
+    def remove(self, room):
+        """
+        Stop firing a room.
+
+        Args:
+            room (Object): The room to stop firing.
+        """
+        entry = self.rooms.pop(room, None)
+        if entry is None:
+            return
+        bucket = self.slots.get(entry[0])
+        if bucket is not None:
+            bucket.discard(room)
+            if not bucket:
+                del self.slots[entry[0]]
+
+    def is_scheduled(self, room):
+        """Returns whether room is currently being fired."""
+        return room in self.rooms
+
+    def due(self, now):
+        """
+        Returns the rooms due since the last call and moves each to the
+        next slot on its phase. Rooms carried over from the last tick come
+        first, then the rooms of every slot passed since, so slots missed by
+        a late tick are caught up.
+
+        Args:
+            now (float): The current time.
+        """
+        current = int(now / self.slot_length)
+        last = current - 1 if self.last is None else self.last
+        self.last = max(last, current)
+
+        slots, rooms = self.slots, self.rooms
+        due = [room for room in self.backlog if room in rooms]
+        self.backlog = []
+        seen = set(due)
+        if current - last <= len(slots):
+            passed = range(last + 1, current + 1)
+        else:
+            # After a long pause only visit the slots holding rooms.
+            passed = sorted(slot for slot in slots if slot <= current)
+        for slot in passed:
+            for room in slots.pop(slot, ()):
+                interval = rooms[room][1]
+                count = self.slot_count(interval or self.period)
+                # Keep the room's phase, skipping any whole intervals missed.
+                next_slot = slot + count
+                if next_slot <= current:
+                    next_slot += ((current - next_slot) // count + 1) * count
+                rooms[room] = (next_slot, interval)
+                slots.setdefault(next_slot, set()).add(room)
+                if room not in seen:
+                    seen.add(room)
+                    due.append(room)
+        return due
+
+    def send(self, rooms, display=None):
+        """
+        Display the ambience of rooms in order until max_sends messages have
+        been sent, carrying the rest over to the next tick.
+
+        Args:
+            rooms (list): The rooms due this tick.
+            display (callable, optional): Called with each room to display
+                its ambience, returning the number of messages sent.
+                Defaults to the room's display_ambient_msg().
+
+        Returns:
+            sent (int): The number of messages sent.
+        """
+        limit = self.max_sends
+        sent = 0
+        for index, room in enumerate(rooms):
+            if limit is not None and sent >= limit:
+                self.backlog = list(rooms[index:])
+                break
+            try:
+                if display is None:
+                    sent += room.display_ambient_msg() or 0
+                else:
+                    sent += display(room) or 0
+            except Exception:
+                # One broken room shouldn't stop the rest of the batch.
+                continue
+        return sent
+
+
+class AmbienceScheduler(AmbienceSlots):
+    """
+    AmbienceSlots driven by a reactor loop of its own, for rooms that add
+    and remove themselves. The loop only runs while rooms are scheduled, and
+    the pools of every due room are sampled in one batch each tick.
+    """
+    tick_rate = AMBIENCE_TICK_RATE
+    clock_rate = AMBIENCE_CLOCK_RATE
+
+    def __init__(self):
+        super().__init__(slot_length=self.tick_rate)
+        self.ticker = None
+        self.next_clock = 0
+
+    def add(self, room, interval=30):
+        """
+        Schedule a room to fire every interval seconds.
+
+        Args:
+            room (Object): Object with a display_ambient_msg() method.
+            interval (int): Seconds between ambient messages.
+        """
+        super().add(room, interval)
+        self._start()
+
+    def remove(self, room):
+        """
+        Stop firing a room.
+
+        Args:
+            room (Object): The room to stop firing.
+        """
+        super().remove(room)
+        if not self.rooms:
+            self._stop()
+
+    def tick(self):
+        """
+        Called every tick_rate seconds. Fires the rooms due since the last
+        tick.
+        """
+        now = time.time()
+        if self.clock_rate is not None and now >= self.next_clock:
+            self.next_clock = now + self.clock_rate
+            AMBIENT_POOLS.update_clock()
+        self.fire(self.due(now))
+
+    def fire(self, batch):
+        """
+        Draw a message for every room of the batch at once and display
+        them, up to max_sends messages.
+
+        Args:
+            batch (list): Rooms due to fire this tick.
+
+        Returns:
+            sent (int): The number of messages sent.
+        """
+        rooms, pools = [], []
+        for room in batch:
+            try:
+                pools.append(AMBIENT_POOLS.get(room))
+            except Exception:
+                # A room whose pool can't be built shouldn't stop the rest.
+                continue
+            rooms.append(room)
+        drawn = dict((room, msg) for room, msg
+                     in zip(rooms, sample_batch(pools)) if msg)
+        rooms = [room for room in rooms if room in drawn]
+        return self.send(rooms,
+                         lambda room: room.display_ambient_msg(drawn[room]))
+
+    def _start(self):
+        """Start the reactor loop if it isn't already running."""
+        if self.ticker is None:
+            from twisted.internet.task import LoopingCall
+            self.ticker = LoopingCall(self.tick)
+            self.ticker.start(self.tick_rate, now=False)
+
+    def _stop(self):
+        """Stop the reactor loop once there is nothing left to fire."""
+        if self.ticker is not None:
+            if self.ticker.running:
+                self.ticker.stop()
+            self.ticker = None
+        self.backlog = []
+        self.last = None
+
+
+AMBIENT_POOLS = AmbientPoolCache()
+AMBIENT_LISTENERS = AmbienceListeners()
+AMBIENCE_SCHEDULER = AmbienceScheduler()
+AMBIENCE_SLOTS = AmbienceSlots()
@@ -14,10 +14,14 @@ By default:
     Characters return their own messages + the messages of worn clothing.
     Rooms return their own messages + the messages returned by their contents.
     
-When a player enters a room, the room subscribes to a timer. When the interval
-has elapsed the room sends an ambient message to it's contents randomly chosen
-from the list returned by return_ambient_msgs(). When no players are in the room
-it unsubscribes from the timer.
+When a player enters a room, the room is added to the AMBIENCE_SCHEDULER. When
+the interval has elapsed the room sends an ambient message to it's contents
+randomly chosen from the list returned by return_ambient_msgs(). When no players
+are in the room it is removed from the scheduler. Players are followed by the
+OCCUPANCY index of features/occupancy.py, so logging in and out of a room
+counts as entering and leaving it. The schedule is held in
+memory so moving never writes to the database, and is rebuilt when
+OCCUPANCY.rebuild() re-indexes the rooms players are in at server start.
 
 Expansions:
 - Command to control Ambient messages
@@ -25,9 +29,9 @@ Expansions:
 """
 
 from evennia import DefaultObject, DefaultCharacter, DefaultRoom, DefaultScript
-from evennia import TICKER_HANDLER as tickerhandler
-import random
-from evennia.server.sessionhandler import SESSIONS
+from features.occupancy import OccupancyMixin
+from .ambience_handler import (AMBIENCE_SCHEDULER, AMBIENT_POOLS,
+                               AMBIENT_LISTENERS)
 
 
 class AmbientObj(DefaultObject):
@@ -48,7 +52,16 @@ class AmbientObj(DefaultObject):
         super(AmbientObj, self).at_object_creation()
         self.db.ambient_switch = True
         self.db.ambient_msgs = []
-        
+        AMBIENT_POOLS.monitor(self)
+
+    def at_init(self):
+        """
+        Called when the object is loaded into the cache. Monitors the
+        ambient Attributes so cached pools are dropped when they change.
+        """
+        super(AmbientObj, self).at_init()
+        AMBIENT_POOLS.monitor(self)
+
     def return_ambient_msgs(self):
         """
         In the basic typeclass, merely returns the raw ambient_msgs list.
@@ -57,7 +70,7 @@ class AmbientObj(DefaultObject):
             return self.db.ambient_msgs
 
 
-class AmbientChararacter(DefaultCharacter, AmbientObj):
+class AmbientChararacter(OccupancyMixin, DefaultCharacter, AmbientObj):
     """
     Typeclass for the Ambient Character.
     
@@ -66,14 +79,58 @@ class AmbientChararacter(DefaultCharacter, AmbientObj):
         ambient_msgs (list): List of ambient message strings
     """
         
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        """
+        Called after an object has been moved into this object. Drops the
+        cached contribution of the character.
+        """
+        super(AmbientChararacter, self).at_object_receive(moved_obj,
+                                                          source_location,
+                                                          **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """
+        Called just before an object leaves from inside this object. Drops
+        the cached contribution of the character.
+        """
+        super(AmbientChararacter, self).at_object_leave(moved_obj,
+                                                        target_location,
+                                                        **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        """
+        Called just after the Account disconnected from this object. Forgets
+        the character's ambience budget once its last session has left.
+        """
+        super(AmbientChararacter, self).at_post_unpuppet(account,
+                                                         session=session,
+                                                         **kwargs)
+        if not self.sessions.count():
+            AMBIENT_LISTENERS.remove(self)
+
+    def at_equipment_change(self, item):
+        """
+        Called by equipment when it is worn or removed. Drops the cached
+        contribution of the character so it is rebuilt on the next fire.
+
+        Args:
+            item (Object): The item worn or removed.
+        """
+        AMBIENT_POOLS.invalidate(self)
+
     def return_ambient_msgs(self):
         """
         Collects the ambient messages from the characters worn equipment and 
-        adds them to the characters own messages
+        adds them to the characters own messages. This is only called when
+        the character's cached contribution has been invalidated.
         """
         if self.db.ambient_switch:
-            ambient_msgs = self.db.ambient_msgs
-            # Append equipment messages here.
+            ambient_msgs = list(self.db.ambient_msgs or [])
+            for obj in self.contents_get():
+                if obj.db.worn:
+                    ambient_msgs.extend(AMBIENT_POOLS.contribution(obj) or [])
             return ambient_msgs
 
 
@@ -85,7 +142,6 @@ class AmbientRoom(DefaultRoom, AmbientObj):
         ambient_switch (Bool): Whether ambient msgs will be sent
         ambient_msgs (list): List of ambient message strings
         ambient_interval (int): Seconds between ambient messages
-        connected_to_ticker (Bool): Whether connected to ticker or not
     """
 
     def at_object_creation(self):
@@ -96,7 +152,6 @@ class AmbientRoom(DefaultRoom, AmbientObj):
         """
         super(AmbientRoom, self).at_object_creation()
         self.db.ambient_interval = 30
-        self.db.connected_to_ticker = False
     
     def at_object_receive(self, moved_obj, source_location, **kwargs):
         """
@@ -108,14 +163,24 @@ class AmbientRoom(DefaultRoom, AmbientObj):
             **kwargs (dict): Arbitrary, optional arguments for users
                 overriding the call (unused by default).
         """
-        super(AmbientRoom, self).at_object_receive()
+        super(AmbientRoom, self).at_object_receive(moved_obj, source_location,
+                                                   **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_room_inhabited(self):
+        """
+        Called by the OCCUPANCY index when the first player arrives in or
+        logs into this room.
+        """
         if self.db.ambient_switch:
-            # If player enters and not already, connect to ticker
-            if moved_obj.has_account and not self.db.connected_to_ticker:
-                tickerhandler.add(self.db.ambient_interval,
-                                  self.display_ambient_msg(),
-                                  persistent=True)
-                self.db.connected_to_ticker = True
+            AMBIENCE_SCHEDULER.add(self, self.db.ambient_interval)
+
+    def at_room_vacated(self):
+        """
+        Called by the OCCUPANCY index when the last player leaves or logs
+        out of this room. Stop firing.
+        """
+        AMBIENCE_SCHEDULER.remove(self)
 
     def at_object_leave(self, moved_obj, target_location, **kwargs):
         """
@@ -126,31 +191,36 @@ class AmbientRoom(DefaultRoom, AmbientObj):
             **kwargs (dict): Arbitrary, optional arguments for users
                 overriding the call (unused by default).
         """
-        if self.db.connected_to_ticker:
-            # If we no longer have players in the room. Turn off ticker.
-            if not [obj.has_account for obj in self.contents_get()]:
-                tickerhandler.remove(self.db.ambient_interval,
-                                     self.display_ambient_msg())
-                self.db.connected_to_ticker = False
-            pass
+        super(AmbientRoom, self).at_object_leave(moved_obj, target_location,
+                                                 **kwargs)
+        AMBIENT_POOLS.invalidate(self)
 
-    def display_ambient_msg(self):
+    def display_ambient_msg(self, msg=None):
         """
-        Displays an ambient message selected at random from list returned by
-        return_ambient_msgs().
-        """
-        self.msg_contents(random(self.return_ambient_msgs))
+        Displays an ambient message selected at random from the room's
+        cached pool of messages.
+
+        Args:
+            msg (str, optional): A message already drawn from the pool by
+                the AMBIENCE_SCHEDULER.
+
+        Returns:
+            sent (int): The number of characters the message was sent to.
+        """
+        if msg is None:
+            msg = AMBIENT_POOLS.get(self).sample()
+        if msg:
+            return AMBIENT_LISTENERS.msg_contents(self, msg)
+        return 0
     
     def return_ambient_msgs(self):
         """
         Collects the ambient messages from room contents and 
-        adds them to the Rooms own messages.
+        adds them to a copy of the Rooms own messages. This is only called
+        when the room's cached pool has been invalidated.
         """
         if self.db.ambient_switch:
-            ambient_msgs = self.db.ambient_msgs
+            ambient_msgs = list(self.db.ambient_msgs or [])
             for obj in self.contents_get():
-                try:
-                    ambient_msgs.extend(obj.return_ambient_msgs())
-                except:
-                    continue
+                ambient_msgs.extend(AMBIENT_POOLS.contribution(obj) or [])
             return ambient_msgs
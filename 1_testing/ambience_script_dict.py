@@ -16,7 +16,16 @@ By default:
     
 A global script set at 30 second intervals determines which rooms have
 players in them and triggers an ambient message picked at random by the
-returned options.
+returned options. Inhabited rooms are read from the OCCUPANCY index, which
+characters keep up to date as they are puppeted and move, so each interval
+only touches rooms with players in them.
+
+The StaggeredAmbientScript instead ticks every second and fires each room on
+its own deterministic phase within the 30 seconds, so outbound messages are
+spread evenly rather than sent in one burst. Rooms are bucketed by phase in
+AMBIENCE_SLOTS as they become inhabited or empty, so a tick only touches the
+rooms due in it, and no more than AMBIENCE_MAX_SENDS_PER_TICK messages are
+sent in a tick.
 
 Messages are stored in a dictioary on the object: {message:weight}
 
@@ -26,9 +35,11 @@ Expansions:
 """
 
 from evennia import DefaultObject, DefaultCharacter, DefaultRoom, DefaultScript
-from evennia import TICKER_HANDLER as tickerhandler
-import random
-from evennia.server.sessionhandler import SESSIONS
+import time
+from features.occupancy import OCCUPANCY, OccupancyMixin
+from .ambience_handler import (AMBIENT_POOLS, AMBIENT_LISTENERS,
+                               AMBIENCE_SLOTS, AMBIENCE_TICK_RATE,
+                               AMBIENCE_CLOCK_RATE)
 
 # -----------------------------------------------------------------------------
 # Ambient Message Storage
@@ -55,7 +66,16 @@ class AmbientObj(DefaultObject):
         super(AmbientObj, self).at_object_creation()
         self.db.ambient_switch = True
         self.db.ambient_msgs = {}
-        
+        AMBIENT_POOLS.monitor(self)
+
+    def at_init(self):
+        """
+        Called when the object is loaded into the cache. Monitors the
+        ambient Attributes so cached pools are dropped when they change.
+        """
+        super(AmbientObj, self).at_init()
+        AMBIENT_POOLS.monitor(self)
+
     def return_ambient_msgs(self):
         """
         In the basic typeclass, merely returns the raw ambient_msgs dictionary.
@@ -64,7 +84,7 @@ class AmbientObj(DefaultObject):
             return self.db.ambient_msgs
 
 
-class AmbientChararacter(DefaultCharacter, AmbientObj):
+class AmbientChararacter(OccupancyMixin, DefaultCharacter, AmbientObj):
     """
     Typeclass for the Ambient Character.
     
@@ -74,14 +94,58 @@ class AmbientChararacter(DefaultCharacter, AmbientObj):
                              Eg. {"The sun shines brightly": 1}
     """
         
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        """
+        Called after an object has been moved into this object. Drops the
+        cached contribution of the character.
+        """
+        super(AmbientChararacter, self).at_object_receive(moved_obj,
+                                                          source_location,
+                                                          **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """
+        Called just before an object leaves from inside this object. Drops
+        the cached contribution of the character.
+        """
+        super(AmbientChararacter, self).at_object_leave(moved_obj,
+                                                        target_location,
+                                                        **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        """
+        Called just after the Account disconnected from this object. Forgets
+        the character's ambience budget once its last session has left.
+        """
+        super(AmbientChararacter, self).at_post_unpuppet(account,
+                                                         session=session,
+                                                         **kwargs)
+        if not self.sessions.count():
+            AMBIENT_LISTENERS.remove(self)
+
+    def at_equipment_change(self, item):
+        """
+        Called by equipment when it is worn or removed. Drops the cached
+        contribution of the character so it is rebuilt on the next fire.
+
+        Args:
+            item (Object): The item worn or removed.
+        """
+        AMBIENT_POOLS.invalidate(self)
+
     def return_ambient_msgs(self):
         """
         Collects the ambient messages from the characters worn equipment and 
-        adds them to the characters own messages
+        adds them to the characters own messages. This is only called when
+        the character's cached contribution has been invalidated.
         """
         if self.db.ambient_switch:
-            ambient_msgs = self.db.ambient_msgs
-            # Append equipment messages here.
+            ambient_msgs = dict(self.db.ambient_msgs or {})
+            for obj in self.contents_get():
+                if obj.db.worn:
+                    ambient_msgs.update(AMBIENT_POOLS.contribution(obj) or {})
             return ambient_msgs
 
 
@@ -95,28 +159,70 @@ class AmbientRoom(DefaultRoom, AmbientObj):
                              Eg. {"The sun shines brightly": 1}
     """
 
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        """
+        Called after an object has been moved into this object.
+        Args:
+            moved_obj (Object): The object moved into this one
+            source_location (Object): Where `moved_object` came from.
+                Note that this could be `None`.
+            **kwargs (dict): Arbitrary, optional arguments for users
+                overriding the call (unused by default).
+        """
+        super(AmbientRoom, self).at_object_receive(moved_obj, source_location,
+                                                   **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
+    def at_room_inhabited(self):
+        """
+        Called by the OCCUPANCY index when the first player arrives in or
+        logs into this room.
+        """
+        AMBIENCE_SLOTS.add(self)
+
+    def at_room_vacated(self):
+        """
+        Called by the OCCUPANCY index when the last player leaves or logs
+        out of this room.
+        """
+        AMBIENCE_SLOTS.remove(self)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """
+        Called just before an object leaves from inside this object
+        Args:
+            moved_obj (Object): The object leaving
+            target_location (Object): Where `moved_obj` is going.
+            **kwargs (dict): Arbitrary, optional arguments for users
+                overriding the call (unused by default).
+        """
+        super(AmbientRoom, self).at_object_leave(moved_obj, target_location,
+                                                 **kwargs)
+        AMBIENT_POOLS.invalidate(self)
+
     def display_ambient_msg(self):
         """
-        Displays an ambient message selected at random from list returned by
-        return_ambient_msgs().
+        Displays an ambient message selected at random from the room's
+        cached pool of messages.
+
+        Returns:
+            sent (int): The number of characters the message was sent to.
         """
-        msgs = self.return_ambient_msgs()
-        self.msg_contents(random.choices(list(msgs.keys()), 
-                                         weights=list(msgs.values()),
-                                         k=1)[0])
+        msg = AMBIENT_POOLS.get(self).sample()
+        if msg:
+            return AMBIENT_LISTENERS.msg_contents(self, msg)
+        return 0
     
     def return_ambient_msgs(self):
         """
         Collects the ambient messages from room contents and 
-        adds them to the Rooms own messages.
+        adds them to a copy of the Rooms own messages. This is only called
+        when the room's cached pool has been invalidated.
         """
         if self.db.ambient_switch:
-            ambient_msgs = self.db.ambient_msgs
+            ambient_msgs = dict(self.db.ambient_msgs or {})
             for obj in self.contents_get():
-                try:
-                    ambient_msgs.update(obj.return_ambient_msgs())
-                except:
-                    continue
+                ambient_msgs.update(AMBIENT_POOLS.contribution(obj) or {})
             return ambient_msgs
 
 # -----------------------------------------------------------------------------
@@ -141,16 +247,45 @@ class AmbientScript(DefaultScript):
         """
         Called every self.interval seconds.
         """
-        # Get puppets with online players connected (and thus have a location)
-        online_chars = [session.puppet for session in SESSIONS
-                        if session.puppet]
+        AMBIENT_POOLS.update_clock()
 
-        # Get puppet locations with no repeats
-        inhabited_rooms = list(set([puppet.location for puppet in online_chars]))
-
-        # Message room with random ambient message
-        for room in inhabited_rooms:
+        # Message inhabited rooms with random ambient message
+        for room in OCCUPANCY.inhabited_rooms():
             try:
                 room.display_ambient_msg()
-            except:
+            except Exception:
                 continue
+
+
+class StaggeredAmbientScript(AmbientScript):
+    """
+    A Global Script that spreads inhabited rooms across the ambience period.
+    Each room is given a deterministic phase offset and is fired on the tick
+    its phase falls in, read from the buckets of AMBIENCE_SLOTS, the same
+    schedule the ambient rooms use. No more than AMBIENCE_MAX_SENDS_PER_TICK
+    messages are sent in a tick, the rooms left over are carried over to the
+    next tick.
+    """
+    def at_script_creation(self):
+        super(StaggeredAmbientScript, self).at_script_creation()
+        self.key = "staggered_ambiance_script"
+        self.interval = AMBIENCE_TICK_RATE
+        self.db.period = 30
+
+    def at_start(self):
+        """
+        Called when the script is started or the server reloads.
+        """
+        AMBIENCE_SLOTS.configure(self.db.period, self.interval)
+        self.ndb.next_clock = 0
+
+    def at_repeat(self):
+        """
+        Called every AMBIENCE_TICK_RATE seconds.
+        """
+        now = time.time()
+        if now >= (self.ndb.next_clock or 0):
+            self.ndb.next_clock = now + AMBIENCE_CLOCK_RATE
+            AMBIENT_POOLS.update_clock()
+
+        AMBIENCE_SLOTS.send(AMBIENCE_SLOTS.due(now))
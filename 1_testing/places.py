@@ -0,0 +1,912 @@
+"""
+Places - NEEDS TESTING
+
+CloudKeeper
+
+Places are objects that create areas that players can join and take part in 
+convrsations with other joinees in a larger room. It does not restrict a 
+players ability to take part in the larger room.
+
+Places are interacted with by a command based on the objects name - like exits.
+
+Examples:
+    place/join Hi Guys!
+        >Player joins the Place
+        >Player says to group, "Hi Guys!"
+    place How are you?
+        >Player says to group, "How are you?"
+    place/leave Bye Guys!
+        >Player says to group, "Bye Guys!"
+        >Player leaves the group
+    place/join/leave I just want to tell you both good luck. We're all counting on you.
+        >Player joins the Place
+        >Player says to the group, "I just want to tell you both good luck. We'reall counting on you."
+        >Player leaves the Place
+
+While the server runs, PLACE_OCCUPANTS keeps who is at which place in memory
+as weak references, so messaging a place never queries the database. Where
+occupants are stored durably is up to the storage backend set by the
+PLACES_STORAGE option:
+
+    "tag"       - The character gets a tag ("#dbref", category="places").
+                  One tag write per join and leave.
+    "attribute" - The place keeps a db.occupants list. One Attribute write
+                  per join and leave.
+    "memory"    - Nothing is written on join and leave. Changed places are
+                  snapshot to db.occupants every PLACES_SNAPSHOT_INTERVAL
+                  seconds and when the server stops, so a crash can lose
+                  the changes since the last snapshot.
+
+The registry is rebuilt from storage the first time it is used after a start
+or reload. Compare the backends for your world with:
+
+    python 1_testing/places_benchmark.py --places 500 --chars 300
+
+Characters get a `places` handler from the PlacesMixin, which tracks the one
+place they are at:
+
+    from typeclasses.characters import Character
+
+    class PlacesCharacter(PlacesMixin, Character):
+        pass
+
+    caller.places.current       # The PlaceObj the caller is at, or None.
+    caller.places.join(place)   # Leave the current place and join place.
+    caller.places.leave()       # Leave the current place.
+
+Rooms get the PlacesRoomMixin, which removes characters from their place as
+they leave the room, and characters leave their place as they log off, so
+messaging a place needs no location checks:
+
+    from typeclasses.rooms import Room
+
+    class PlacesRoom(PlacesRoomMixin, Room):
+        pass
+
+Builders can cap how many characters a place holds, and how many characters
+can be at places in a room, with @place/limit. A full place turns new joiners
+away and points them at its overflow place, set with @place/overflow. The
+counts are kept by PLACE_OCCUPANTS so admission never counts occupants.
+
+PLACE_INDEX keeps the places in each room, by typeclass, so listing them with
+@place never scans the contents of the room.
+
+Places can be opted in to eavesdropping with @place/eavesdrop, giving the
+fraction of what is said there that others in the room overhear. Whether a
+message is overheard, and which of its words survive, is drawn once per
+message and the muffled line is multicast to the room's puppets from the
+OCCUPANCY index of features/occupancy.py, leaving out the place's occupants.
+Characters need the OccupancyMixin to overhear.
+
+When the "memory" storage is used, at_server_stop() in
+server/conf/at_server_startstop.py calls PLACE_OCCUPANTS.storage.snapshot()
+so it is written out on shutdown and reload.
+
+Expansion:
+-look at place give you a list of the occupants.
+"""
+import random
+import weakref
+import evennia
+from evennia.utils import lazy_property
+from evennia.commands.default.muxcommand import MuxCommand
+from evennia.commands.cmdset import CmdSet
+from evennia.utils import evtable, create
+from typeclasses.objects import Object
+from django.conf import settings
+from features.multicast import multicast
+from features.occupancy import OCCUPANCY
+
+_DEFAULT_WIDTH = settings.CLIENT_DEFAULT_WIDTH
+
+# Options start here.
+# Where occupants are stored, one of the keys of PLACES_STORAGES below.
+PLACES_STORAGE = "tag"
+# Seconds between snapshots of changed places by the "memory" storage.
+PLACES_SNAPSHOT_INTERVAL = 300
+# Fraction of the words of an overheard message that can be made out.
+PLACES_EAVESDROP_CLARITY = 0.5
+# What replaces the words that can't be made out.
+PLACES_EAVESDROP_MUFFLE = "..."
+
+###############################################################################
+#
+# Storage Backends
+#
+###############################################################################
+
+
+class PlaceStorage(object):
+    """
+    Durable storage of who is at which place. Only written to on join and
+    leave, and only read when PLACE_OCCUPANTS is rebuilt.
+    """
+
+    def load(self):
+        """Returns every stored (place, occupant) pair."""
+        return []
+
+    def join(self, place, occupant):
+        """Store that occupant is at place."""
+        pass
+
+    def leave(self, place, occupant):
+        """Store that occupant is no longer at place."""
+        pass
+
+    def snapshot(self):
+        """Write out anything held back. Called when the server stops."""
+        pass
+
+
+class TagStorage(PlaceStorage):
+    """
+    Stores the place as a ("#dbref", category="places") tag on the occupant.
+    """
+
+    def load(self):
+        """
+        Returns every tagged (place, occupant) pair with two queries. Tags of
+        places that no longer exist are ignored.
+        """
+        tagged = {}
+        for occupant in evennia.search_tag(category="places"):
+            for dbref in occupant.tags.get(category="places", return_list=True):
+                tagged[occupant] = int(dbref.lstrip("#"))
+        places = evennia.ObjectDB.objects.filter(id__in=set(tagged.values()))
+        places = dict((place.id, place) for place in places)
+        return [(places[place_id], occupant)
+                for occupant, place_id in tagged.items() if place_id in places]
+
+    def join(self, place, occupant):
+        """Store that occupant is at place."""
+        occupant.tags.add(place.dbref, category="places")
+
+    def leave(self, place, occupant):
+        """Store that occupant is no longer at place."""
+        occupant.tags.remove(place.dbref, category="places")
+
+
+class AttributeStorage(PlaceStorage):
+    """
+    Stores the occupants as a db.occupants list on the place.
+    """
+
+    def load(self):
+        """
+        Returns the (place, occupant) pairs of every place, subclasses of
+        PlaceObj included.
+        """
+        return [(place, occupant) for place in PlaceObj.objects.all_family()
+                for occupant in place.db.occupants or []]
+
+    def join(self, place, occupant):
+        """Store that occupant is at place."""
+        place.db.occupants = list(place.db.occupants or []) + [occupant]
+
+    def leave(self, place, occupant):
+        """Store that occupant is no longer at place."""
+        place.db.occupants = [obj for obj in place.db.occupants or []
+                              if obj != occupant]
+
+
+class MemoryStorage(AttributeStorage):
+    """
+    Keeps occupants only in PLACE_OCCUPANTS, snapshotting the places that
+    changed to db.occupants every PLACES_SNAPSHOT_INTERVAL seconds.
+    """
+
+    def __init__(self, interval=PLACES_SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.dirty = weakref.WeakSet()
+        self.ticker = None
+
+    def join(self, place, occupant):
+        """Mark place for the next snapshot."""
+        self.dirty.add(place)
+        self._start()
+
+    leave = join
+
+    def snapshot(self):
+        """Write the occupants of every changed place to db.occupants."""
+        dirty, self.dirty = list(self.dirty), weakref.WeakSet()
+        for place in dirty:
+            place.db.occupants = list(PLACE_OCCUPANTS.occupants(place))
+
+    def _start(self):
+        """Start the snapshot loop if it isn't already running."""
+        if self.ticker is None:
+            from twisted.internet.task import LoopingCall
+            self.ticker = LoopingCall(self.snapshot)
+            self.ticker.start(self.interval, now=False)
+
+
+PLACES_STORAGES = {"tag": TagStorage,
+                   "attribute": AttributeStorage,
+                   "memory": MemoryStorage}
+
+###############################################################################
+#
+# Occupant Registry
+#
+###############################################################################
+
+
+class PlaceOccupants(object):
+    """
+    In-process registry of the occupants of every place, and of the place
+    every occupant is at.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or PLACES_STORAGES[PLACES_STORAGE]()
+        self.places = weakref.WeakKeyDictionary()
+        self.current = weakref.WeakKeyDictionary()
+        self.rooms = weakref.WeakKeyDictionary()
+        self.built = False
+
+    def rebuild(self):
+        """
+        Rebuild the registry from storage.
+        """
+        self.places = weakref.WeakKeyDictionary()
+        self.current = weakref.WeakKeyDictionary()
+        self.rooms = weakref.WeakKeyDictionary()
+        self.built = True
+        for place, occupant in self.storage.load():
+            self.add(place, occupant)
+
+    def occupants(self, place):
+        """
+        Returns the live set of occupants of place.
+
+        Args:
+            place (PlaceObj): The place to return the occupants of.
+        """
+        if not self.built:
+            self.rebuild()
+        return self.places.setdefault(place, weakref.WeakSet())
+
+    def place(self, occupant):
+        """Returns the place occupant is at, or None."""
+        if not self.built:
+            self.rebuild()
+        return self.current.get(occupant)
+
+    def room_count(self, room):
+        """Returns how many characters are at places in room."""
+        if not self.built:
+            self.rebuild()
+        return self.rooms.get(room, 0)
+
+    def admits(self, place, occupant=None):
+        """
+        Returns whether place and the room it is in have space for another
+        occupant. Limits are set in db.max_occupants on the place and
+        db.max_place_occupants on the room, None meaning no limit.
+
+        Args:
+            place (PlaceObj): The place being joined.
+            occupant (Object, optional): Who is joining. Leaving their
+                current place in the same room frees up a space.
+        """
+        limit = place.db.max_occupants
+        if limit is not None and len(self.occupants(place)) >= limit:
+            return False
+        room = place.location
+        limit = room.db.max_place_occupants if room else None
+        if limit is None:
+            return True
+        count = self.room_count(room)
+        current = self.current.get(occupant)
+        if current is not None and current.location == room:
+            count -= 1
+        return count < limit
+
+    def join(self, place, occupant):
+        """Store and record occupant as being at place."""
+        self.storage.join(place, occupant)
+        self.add(place, occupant)
+
+    def leave(self, place, occupant):
+        """Store and record occupant as no longer being at place."""
+        self.storage.leave(place, occupant)
+        self.remove(place, occupant)
+
+    def add(self, place, occupant):
+        """Record occupant as being at place."""
+        occupants = self.occupants(place)
+        if occupant not in occupants:
+            occupants.add(occupant)
+            room = place.location
+            if room is not None:
+                self.rooms[room] = self.rooms.get(room, 0) + 1
+        self.current[occupant] = place
+
+    def remove(self, place, occupant):
+        """Record occupant as no longer being at place."""
+        occupants = self.occupants(place)
+        if occupant in occupants:
+            occupants.discard(occupant)
+            room = place.location
+            if room is not None:
+                if self.rooms.get(room, 0) > 1:
+                    self.rooms[room] -= 1
+                else:
+                    self.rooms.pop(room, None)
+        if self.current.get(occupant) is place:
+            del self.current[occupant]
+
+
+PLACE_OCCUPANTS = PlaceOccupants()
+
+###############################################################################
+#
+# Place Index
+#
+###############################################################################
+
+
+class PlaceIndex(object):
+    """
+    Per-room index of the places in each room, keyed by typeclass path. A
+    room is scanned once, the first time it is asked for, and is then kept
+    up to date by the creation, move and delete hooks of PlaceObj.
+    """
+
+    def __init__(self):
+        self.rooms = weakref.WeakKeyDictionary()
+
+    def places(self, room, typeclass=None):
+        """
+        Returns the places in room.
+
+        Args:
+            room (Object): The room to list the places of.
+            typeclass (str, optional): Only return places of this exact
+                typeclass path.
+        """
+        if room is None:
+            return []
+        index = self.rooms.get(room)
+        if index is None:
+            index = self.rooms[room] = {}
+            for obj in room.contents:
+                if isinstance(obj, PlaceObj):
+                    index.setdefault(obj.typeclass_path, []).append(obj)
+        if typeclass is not None:
+            return list(index.get(typeclass, ()))
+        return [place for places in index.values() for place in places]
+
+    def add(self, place, room):
+        """Index place in room, if room has been indexed yet."""
+        index = self.rooms.get(room)
+        if index is not None:
+            places = index.setdefault(place.typeclass_path, [])
+            if place not in places:
+                places.append(place)
+
+    def remove(self, place, room):
+        """Remove place from the index of room."""
+        index = self.rooms.get(room)
+        if index is not None:
+            places = index.get(place.typeclass_path, [])
+            if place in places:
+                places.remove(place)
+            if not places:
+                index.pop(place.typeclass_path, None)
+
+
+PLACE_INDEX = PlaceIndex()
+
+###############################################################################
+#
+# Character and Room Mixins
+#
+###############################################################################
+
+
+class PlacesHandler(object):
+    """
+    Handler for the place a character is at. Join and leave are a registry
+    update and at most a single storage write.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    @property
+    def current(self):
+        """The place the character is at, or None."""
+        return PLACE_OCCUPANTS.place(self.obj)
+
+    def join(self, place):
+        """
+        Join place, leaving the current place first.
+
+        Args:
+            place (PlaceObj): The place to join.
+
+        Returns:
+            previous (PlaceObj or None): The place that was left.
+        """
+        previous = self.current
+        if previous is place:
+            return None
+        if previous is not None:
+            self.leave()
+        PLACE_OCCUPANTS.join(place, self.obj)
+        return previous
+
+    def leave(self):
+        """
+        Leave the current place.
+
+        Returns:
+            place (PlaceObj or None): The place that was left.
+        """
+        place = self.current
+        if place is None:
+            return None
+        PLACE_OCCUPANTS.leave(place, self.obj)
+        return place
+
+
+class PlacesMixin(object):
+    """
+    A mixin to put on Character objects giving them the `places` handler.
+    Characters leave their place when they log off, as logging off moves
+    them out of the room without calling its at_object_leave().
+    """
+
+    @lazy_property
+    def places(self):
+        """Handler for the place the character is at."""
+        return PlacesHandler(self)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        """
+        Called just after the Account successfully disconnected from this
+        object. Leaves the current place once the last session has left.
+        """
+        super().at_post_unpuppet(account, session=session, **kwargs)
+        if not self.sessions.count():
+            place = self.places.current
+            if place is not None:
+                place.leave_occupants(self)
+
+
+class PlacesRoomMixin(object):
+    """
+    A mixin to put on Room objects. Removes occupants from the places in
+    the room as they leave it.
+    """
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """
+        Called just before an object leaves from inside this object.
+        """
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        place = PLACE_OCCUPANTS.place(moved_obj)
+        if place is not None and place.location == self:
+            place.leave_occupants(moved_obj)
+
+
+###############################################################################
+#
+# Places
+#
+###############################################################################
+
+
+class PlaceCommand(MuxCommand):
+    """
+    Speak only to players who have 'joined' the 'Place' object.
+
+    Usage:
+        place[/switch] <message>
+
+    Examples:
+        place/join Hi Guys!
+            >Player joins the Place
+            >Player says to group, "Hi Guys!"
+        place How are you?
+            >Player says to group, "How are you?"
+        place/leave Bye Guys!
+            >Player says to group, "Bye Guys!"
+            >Player leaves the group
+
+    Swtich:
+        /join - Recieve messages being spoken in the 'place'.
+        /leave - Stop receiving messages spoken in the 'place'.
+
+    """
+    obj = None
+
+    def func(self):
+        """Implement Function"""
+        caller = self.caller
+        place = self.obj
+
+        if 'join' in self.switches:
+            if not place.join_occupants(caller):
+                # Already told why, like the place being full.
+                return
+
+        # Catch non-occupant messages
+        if caller not in PLACE_OCCUPANTS.occupants(place):
+            caller.msg("You are not able to join the conversation at the moment.")
+            return
+
+        # Send message to occupants.
+        if self.args:
+            place.say_to_occupants(caller, self.args)
+
+        if 'leave' in self.switches:
+            place.leave_occupants(caller)
+
+
+
+class PlaceObj(Object):
+    """
+    The Place object acts as a localised channel, allowing players to join,
+    listen to and contribute to the conversation of the subscribers.
+
+    The join, say and leave messages are stored on the Place so that they
+    can be configured by builders to match the aesthetic of the Place.
+    """
+    place_command = PlaceCommand
+    priority = 101
+
+    lockstring = "get:false()"
+
+    join_feedback = "You have joined the %s"
+    join_msg = "%s has joined the %s"
+    say_feedback = 'You say to the group, "%s"'
+    say_msg = '%s says to the group, "%s"'
+    leave_feedback = "You have left the %s"
+    leave_msg = "%s has left the %s"
+    full_feedback = "The %s is full."
+    overflow_feedback = "The %s is full, but there is space at the %s."
+    eavesdrop_msg = 'From the %s you overhear, "%s"'
+
+    def overflow_place(self, caller):
+        """
+        Returns the first place along the chain of db.overflow places that
+        has space for caller, or None.
+        """
+        place, seen = self.db.overflow, set([self])
+        while place is not None and place not in seen:
+            if place.location == self.location and PLACE_OCCUPANTS.admits(place, caller):
+                return place
+            seen.add(place)
+            place = place.db.overflow
+        return None
+
+    def at_object_creation(self):
+        """Called once, when the place is first created."""
+        super().at_object_creation()
+        PLACE_INDEX.add(self, self.location)
+
+    def at_after_move(self, source_location, **kwargs):
+        """Called after the place has been moved."""
+        super().at_after_move(source_location, **kwargs)
+        PLACE_INDEX.remove(self, source_location)
+        PLACE_INDEX.add(self, self.location)
+
+    def at_object_delete(self):
+        """
+        Called just before the place is deleted. Its occupants leave, so
+        their tags and the room's place count no longer include it.
+        """
+        if not super().at_object_delete():
+            return False
+        for occupant in list(PLACE_OCCUPANTS.occupants(self)):
+            self.leave_occupants(occupant)
+        PLACE_INDEX.remove(self, self.location)
+        return True
+
+    def join_occupants(self, caller):
+        """
+        Called when a player joins the 'place'
+        
+        Forces player to leave their current place by triggering its
+        leave_occupants() hook.
+
+        Joins the player to this 'place' and triggers joining messages.
+
+        Returns:
+            joined (bool): Whether the player is at the place, False if
+                they were turned away.
+        """
+        # Leave other spaces.
+        current = caller.places.current
+        if current is self:
+            return True
+
+        # Turn the caller away if full, offering an overflow place.
+        if not PLACE_OCCUPANTS.admits(self, caller):
+            overflow = self.overflow_place(caller)
+            if overflow is None:
+                caller.msg(self.full_feedback % self.key)
+            else:
+                caller.msg(self.overflow_feedback % (self.key, overflow.key))
+            return False
+
+        if current is not None:
+            current.leave_occupants(caller)
+
+        # Add caller to occupants and alert occupants.
+        caller.msg(self.join_feedback % self.key)
+        self.message_occupants(self.join_msg % (caller.key, self.key))
+        caller.places.join(self)
+        return True
+
+    def say_to_occupants(self, caller, msg):
+        """Speak to occupants of 'place'"""
+        # Give feedback to caller and prep message to occupants.
+        caller.msg(self.say_feedback % msg)
+        self.message_occupants(self.say_msg % (caller.key, msg), exclude=[caller])
+        self.eavesdrop(msg)
+
+    def eavesdrop(self, msg):
+        """
+        Relay a muffled msg to the rest of the room, for db.eavesdrop of the
+        messages said at the place. One draw decides if msg is overheard and
+        one pass over its words muffles it, whoever is listening.
+        """
+        chance = self.db.eavesdrop
+        if not chance or random.random() >= chance:
+            return
+        listeners = OCCUPANCY.occupants(self.location)
+        if not listeners:
+            return
+        words = [word if random.random() < PLACES_EAVESDROP_CLARITY
+                 else PLACES_EAVESDROP_MUFFLE for word in msg.split()]
+        multicast(listeners, self.eavesdrop_msg % (self.key, " ".join(words)),
+                  exclude=PLACE_OCCUPANTS.occupants(self))
+
+    def message_occupants(self, msg, exclude=[]):
+        """
+        Called to message all occupants of 'place'
+
+        Occupants are removed as they leave the room by PlacesRoomMixin, so
+        everyone in the registry is still here. The message is multicast,
+        so it is prepared once and sent once to each occupant's sessions.
+        """
+        multicast(PLACE_OCCUPANTS.occupants(self), msg, exclude=exclude)
+
+    def leave_occupants(self, caller):
+        """Called when a player leaves a 'place'"""
+
+        caller.places.leave()
+        caller.msg(self.leave_feedback % self.key)
+        self.message_occupants(self.leave_msg % (caller.key, self.key))
+
+    # Place Cmd Set up Functions.
+    def create_place_cmdset(self, placeobj):
+        """
+        Helper function for creating an place command set + command.
+        The command of this cmdset has the same name as the Place
+        object and allows the place to react when the account enter the
+        place's name, triggering messages to occupants.
+        Args:
+            placeobj (Object): The PlaceObj object to base the command on.
+        """
+
+        # create the place command. We give the properties here,
+        # to always trigger metaclass preparations
+        cmd = self.place_command(key=placeobj.db_key.strip().lower(),
+                                 aliases=placeobj.aliases.all(),
+                                 locks=str(placeobj.locks),
+                                 auto_help=False,
+                                 destination=placeobj.db_destination,
+                                 arg_regex=r"^$",
+                                 is_exit=False,
+                                 obj=placeobj)
+        # create a cmdset
+        place_cmdset = CmdSet(None)
+        place_cmdset.key = 'PlaceCmdSet'
+        place_cmdset.priority = self.priority
+        place_cmdset.duplicates = True
+        # add command to cmdset
+        place_cmdset.add(cmd)
+        return place_cmdset
+
+    def at_cmdset_get(self, **kwargs):
+        """
+        Called just before cmdsets on this object are requested by the
+        command handler. If changes need to be done on the fly to the
+        cmdset before passing them on to the cmdhandler, this is the
+        place to do it. This is called also if the object currently
+        has no cmdsets.
+
+        The place cmdset is built once and cached in ndb.place_cmdset. It is
+        only rebuilt when the key, aliases or locks of the place change.
+
+        Kwargs:
+          force_init (bool): If `True`, force a re-build of the cmdset
+            (for example to update aliases).
+        """
+
+        signature = (self.db_key, tuple(self.aliases.all()), self.db_lock_storage)
+        if "force_init" in kwargs or self.ndb.place_cmdset_signature != signature:
+            # we are resetting, or the key, aliases or locks have changed.
+            self.ndb.place_cmdset = self.create_place_cmdset(self)
+            self.ndb.place_cmdset_signature = signature
+            self.cmdset.add_default(self.ndb.place_cmdset, permanent=False)
+        elif not self.cmdset.has_cmdset("PlaceCmdSet", must_be_default=True):
+            # reuse the cached cmdset rather than building a new one.
+            self.cmdset.add_default(self.ndb.place_cmdset, permanent=False)
+
+    def at_init(self):
+        """
+        This is called when this objects is re-loaded from cache. When
+        that happens, we make sure to remove any old ExitCmdSet cmdset
+        (this most commonly occurs when renaming an existing exit)
+        """
+        self.cmdset.remove_default()
+
+###############################################################################
+#
+# Builder Commands
+#
+###############################################################################
+
+
+class CmdPlace(MuxCommand):
+    """
+    Create places to share private conversations within a location.
+    Deleting and Describing Places after creation is handled by the
+    @del and @desc respectively.
+
+    Usage:
+        @place[/create] <objname>[, alias, alias...][= desc]
+        @place/limit <place or here> = <number or none>
+        @place/overflow <place> = <place or none>
+        @place/eavesdrop <place> = <fraction>
+
+    Switches:
+        /create - Create a new place here.
+        /limit - Set how many characters can be at a place, or at all the
+                 places in this room together.
+        /overflow - Set the place to offer when the place is full.
+        /eavesdrop - Set the fraction of what is said at the place that the
+                     rest of the room overhears, 0 for none.
+
+    """
+    key = "@place"
+    switch_options = ("create", "limit", "overflow", "eavesdrop")
+    help_category = "Building"
+    locks = "cmd:perm(create) or perm(Builder)"
+
+    def func(self):
+        """Implement function"""
+        caller = self.caller
+
+        # SWITCHES ------------------------------------------------------------
+        # @place/create <objname>[, alias, alias...][= desc]
+        if 'create' in self.switches:
+
+            # Handle improper use.
+            if not self.args:
+                string = "Usage: @place/create <objname>[, alias, alias...][= desc]"
+                caller.msg(string)
+                return
+
+            # Parse arguments
+            key = self.lhslist.pop(0)
+            aliases = self.lhslist
+            desc = self.rhs
+
+            # Prevent repeats
+            if caller.search(key):
+                caller.msg("Object with name '%s' already exists." % key)
+                return
+
+            # Create Object
+            place = create.create_object(PlaceObj, key, caller.location,
+                                         aliases=aliases)
+            place.db.desc = desc if desc else "A place to talk with others."
+
+            # Message Caller
+            if aliases:
+                string = "You create a new Place: %s (aliases: %s)."
+                string = string % (key, ", ".join(aliases))
+            else:
+                string = "You create a new Place: %s."
+                string = string % place.name
+            caller.msg(string)
+            return
+
+        # @place/limit <place or here> = <number or none>
+        if 'limit' in self.switches:
+            if not self.lhs or not self.rhs:
+                caller.msg("Usage: @place/limit <place or here> = <number or none>")
+                return
+            limit = self.rhs.strip().lower()
+            if limit != "none" and not limit.isdigit():
+                caller.msg("The limit must be a number or none.")
+                return
+            limit = None if limit == "none" else int(limit)
+
+            target = caller.search(self.lhs)
+            if not target:
+                return
+            if target == caller.location:
+                target.db.max_place_occupants = limit
+            elif target.is_typeclass(PlaceObj):
+                target.db.max_occupants = limit
+            else:
+                caller.msg("%s is not a place or this room." % target.key)
+                return
+            caller.msg("The limit for %s is now %s." % (target.key, limit))
+            return
+
+        # @place/overflow <place> = <place or none>
+        if 'overflow' in self.switches:
+            if not self.lhs or not self.rhs:
+                caller.msg("Usage: @place/overflow <place> = <place or none>")
+                return
+            place = caller.search(self.lhs)
+            if not place:
+                return
+            overflow = None
+            if self.rhs.strip().lower() != "none":
+                overflow = caller.search(self.rhs)
+                if not overflow:
+                    return
+            for obj in (place, overflow):
+                if obj is not None and not obj.is_typeclass(PlaceObj):
+                    caller.msg("%s is not a place." % obj.key)
+                    return
+            place.db.overflow = overflow
+            caller.msg("The overflow for %s is now %s."
+                       % (place.key, overflow.key if overflow else None))
+            return
+
+        # @place/eavesdrop <place> = <fraction>
+        if 'eavesdrop' in self.switches:
+            if not self.lhs or not self.rhs:
+                caller.msg("Usage: @place/eavesdrop <place> = <fraction>")
+                return
+            try:
+                chance = float(self.rhs)
+            except ValueError:
+                chance = -1
+            if not 0 <= chance <= 1:
+                caller.msg("The fraction must be a number from 0 to 1.")
+                return
+            place = caller.search(self.lhs)
+            if not place:
+                return
+            if not place.is_typeclass(PlaceObj):
+                caller.msg("%s is not a place." % place.key)
+                return
+            place.db.eavesdrop = chance
+            caller.msg("The rest of the room now overhears %i%% of %s."
+                       % (chance * 100, place.key))
+            return
+
+        # NO SWITCHES ---------------------------------------------------------
+        # @place <Ignored>  # Return list of places at current location.
+        places = PLACE_INDEX.places(caller.location)
+        if not places:
+            caller.msg("No Places available.")
+            return
+
+        # If Places located: Organise EvTable for display
+        table = evtable.EvTable("|wplace|n", "|waliases|n",
+                                "|wdescription|n", maxwidth=_DEFAULT_WIDTH)
+        for place in places:
+            clower = place.key.lower()
+            aliases = place.aliases.all()
+            table.add_row(*["%s" % clower,
+                            "%s" % ",".join(aliases),
+                            place.db.desc])
+        table.reformat_column(0, width=9)
+        table.reformat_column(2, width=14)
+
+        # Send table to player
+        caller.msg("\nAvailable Places:\n%s" % table)
@@ -0,0 +1,329 @@
+"""
+Places Benchmark - Standalone
+
+Cloud_Keeper
+
+Measures what join, say and leave cost with each Places storage backend so
+we can pick the one that fits our database. Runs outside of Evennia:
+
+    python 1_testing/places_benchmark.py --places 500 --chars 300
+
+The real places module is imported against minimal stand-ins for the
+handful of Evennia names it uses. Attributes and tags are plain Python
+dictionaries that count every write, as each one would be a database write
+in the game, and sessions only count what would have been sent.
+
+For every backend a world of N rooms, P places and C connected characters
+is built. Every round each character joins a random place in its room, says
+something there and leaves again. Reported per operation:
+
+    join/say/leave us  - Process CPU time in microseconds.
+    writes/op          - Attribute and tag writes per join and leave.
+    snapshot ms        - Time to snapshot a round of changes, "memory" only.
+    snapshot writes    - Attribute writes made by that snapshot.
+
+Finally every character sits down at a place and PLACE_OCCUPANTS is rebuilt
+from storage, as it is on the first use after a start or reload:
+
+    rebuild ms         - Time to load the occupants and rebuild the registry.
+
+"""
+
+import argparse
+import importlib
+import itertools
+import os
+import random
+import sys
+import time
+import types
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -----------------------------------------------------------------------------
+# Evennia Stand-ins
+# -----------------------------------------------------------------------------
+
+
+class STATS(object):
+    """Counters shared by the stand-ins."""
+    writes = 0
+    sends = 0
+
+
+# Every object created, standing in for the database.
+WORLD = []
+
+
+class AttributeStub(object):
+    """Attribute handler returning None for anything unset, counting writes."""
+
+    def __getattr__(self, name):
+        return None
+
+    def __setattr__(self, name, value):
+        STATS.writes += 1
+        object.__setattr__(self, name, value)
+
+
+class TagStub(object):
+    """Tag handler counting writes."""
+
+    def __init__(self):
+        self.tags = set()
+
+    def add(self, key, category=None):
+        STATS.writes += 1
+        self.tags.add((key, category))
+
+    def remove(self, key, category=None):
+        STATS.writes += 1
+        self.tags.discard((key, category))
+
+    def get(self, key=None, category=None, return_list=False):
+        return [tag for tag, cat in self.tags if cat == category]
+
+
+class SessionStub(object):
+    """A connected session, counting what is sent to it."""
+    _ids = itertools.count(1)
+    sessionhandler = None
+
+    def __init__(self):
+        self.sessid = next(self._ids)
+
+    def data_out(self, **kwargs):
+        STATS.sends += 1
+
+
+class SessionsStub(object):
+    """The sessions handler of an object."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.sessions = []
+
+    def all(self):
+        return self.sessions
+
+    def count(self):
+        return len(self.sessions)
+
+
+class ManagerStub(object):
+    """Stand-in for the manager of a typeclass, found as cls.objects."""
+
+    def __get__(self, obj, cls):
+        manager = ManagerStub()
+        manager.cls = cls
+        return manager
+
+    def all(self):
+        return [obj for obj in WORLD if type(obj) is self.cls]
+
+    def all_family(self):
+        return [obj for obj in WORLD if isinstance(obj, self.cls)]
+
+    def filter(self, id__in=()):
+        ids = set(id__in)
+        return [obj for obj in WORLD if obj.id in ids]
+
+
+def search_tag(key=None, category=None):
+    """Stand-in for evennia.search_tag."""
+    return [obj for obj in WORLD if obj.tags.get(key, category=category)]
+
+
+class ObjectStub(object):
+    """Stand-in for DefaultObject."""
+    _ids = itertools.count(1)
+    objects = ManagerStub()
+
+    def __init__(self, key, location=None):
+        self.id = next(self._ids)
+        self.dbref = "#%i" % self.id
+        self.key = self.db_key = key
+        self.db_lock_storage = ""
+        self.db = AttributeStub()
+        self.ndb = AttributeStub()
+        self.tags = TagStub()
+        self.sessions = SessionsStub(self)
+        self.contents = []
+        self.location = location
+        if location is not None:
+            location.contents.append(self)
+        WORLD.append(self)
+
+    def __repr__(self):
+        return "%s(%s)" % (self.key, self.dbref)
+
+    def msg(self, text=None, **kwargs):
+        for session in self.sessions.all():
+            session.data_out(text=text, **kwargs)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        pass
+
+
+def lazy_property(func):
+    """Stand-in for evennia.utils.lazy_property."""
+    name = "_lazy_" + func.__name__
+
+    def getter(self):
+        if name not in self.__dict__:
+            self.__dict__[name] = func(self)
+        return self.__dict__[name]
+    return property(getter)
+
+
+def make_iter(obj):
+    """Stand-in for evennia.utils.utils.make_iter."""
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return obj
+    return [obj]
+
+
+def install_stubs():
+    """
+    Register the stand-ins as the evennia and django modules the places
+    module imports.
+    """
+    modules = {}
+    for name in ("evennia", "evennia.utils", "evennia.utils.utils",
+                 "evennia.utils.evtable", "evennia.utils.create",
+                 "evennia.commands", "evennia.commands.default",
+                 "evennia.commands.default.muxcommand",
+                 "evennia.commands.cmdset", "django", "django.conf"):
+        modules[name] = types.ModuleType(name)
+
+    modules["evennia"].DefaultObject = ObjectStub
+    modules["evennia"].ObjectDB = ObjectStub
+    modules["evennia"].search_tag = search_tag
+    modules["evennia.utils"].lazy_property = lazy_property
+    modules["evennia.utils"].evtable = modules["evennia.utils.evtable"]
+    modules["evennia.utils"].create = modules["evennia.utils.create"]
+    modules["evennia.utils.utils"].to_str = str
+    modules["evennia.utils.utils"].make_iter = make_iter
+    modules["evennia.commands.default.muxcommand"].MuxCommand = object
+    modules["evennia.commands.cmdset"].CmdSet = object
+    modules["django.conf"].settings = types.SimpleNamespace(
+        CLIENT_DEFAULT_WIDTH=78)
+    sys.modules.update(modules)
+
+    if GAME_DIR not in sys.path:
+        sys.path.insert(0, GAME_DIR)
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+
+
+def build(places, backend, args):
+    """
+    Creates the world for one backend and returns its characters.
+    """
+    del WORLD[:]
+    places.PLACE_OCCUPANTS.__init__(storage=places.PLACES_STORAGES[backend]())
+    places.PLACE_OCCUPANTS.built = True
+    if backend == "memory":
+        places.PLACE_OCCUPANTS.storage._start = lambda: None
+
+    room_class = type("Room", (places.PlacesRoomMixin, ObjectStub), {})
+    char_class = type("Character", (places.PlacesMixin, ObjectStub), {})
+
+    rooms = [room_class("room%i" % i) for i in range(args.rooms)]
+    for i in range(args.places):
+        places.PlaceObj("place%i" % i, random.choice(rooms))
+    chars = []
+    for i in range(args.chars):
+        char = char_class("char%i" % i, random.choice(rooms))
+        char.sessions.sessions.append(SessionStub())
+        chars.append(char)
+    return chars
+
+
+def benchmark(places, backend, args):
+    """
+    Runs one backend and returns its per operation averages.
+    """
+    random.seed(args.seed)
+    chars = build(places, backend, args)
+    storage = places.PLACE_OCCUPANTS.storage
+    timings = {"join": 0.0, "say": 0.0, "leave": 0.0}
+    writes = snapshot_time = snapshot_writes = 0
+    ops = 0
+
+    for _ in range(args.rounds):
+        joined = []
+        for char in chars:
+            spots = [obj for obj in char.location.contents
+                     if isinstance(obj, places.PlaceObj)]
+            if spots:
+                joined.append((char, random.choice(spots)))
+        ops += len(joined)
+
+        STATS.writes = 0
+        start = time.process_time()
+        for char, place in joined:
+            place.join_occupants(char)
+        timings["join"] += time.process_time() - start
+
+        start = time.process_time()
+        for char, place in joined:
+            place.say_to_occupants(char, "Hi Guys!")
+        timings["say"] += time.process_time() - start
+
+        start = time.process_time()
+        for char, place in joined:
+            place.leave_occupants(char)
+        timings["leave"] += time.process_time() - start
+        writes += STATS.writes
+
+        STATS.writes = 0
+        start = time.process_time()
+        storage.snapshot()
+        snapshot_time += time.process_time() - start
+        snapshot_writes += STATS.writes
+
+    # Seat everyone and time rebuilding the registry from storage.
+    for char in chars:
+        spots = [obj for obj in char.location.contents
+                 if isinstance(obj, places.PlaceObj)]
+        if spots:
+            random.choice(spots).join_occupants(char)
+    storage.snapshot()
+    start = time.process_time()
+    places.PLACE_OCCUPANTS.rebuild()
+    rebuild_time = time.process_time() - start
+
+    ops = float(max(ops, 1))
+    rounds = float(args.rounds)
+    return (timings["join"] * 1e6 / ops, timings["say"] * 1e6 / ops,
+            timings["leave"] * 1e6 / ops, writes / (ops * 2),
+            snapshot_time * 1000 / rounds, snapshot_writes / rounds,
+            rebuild_time * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--places", type=int, default=300)
+    parser.add_argument("--chars", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    install_stubs()
+    places = importlib.import_module("1_testing.places")
+    print("%i rooms, %i places, %i characters, %i rounds"
+          % (args.rooms, args.places, args.chars, args.rounds))
+    row = "%-10s %8s %8s %9s %10s %12s %16s %11s"
+    print(row % ("storage", "join us", "say us", "leave us", "writes/op",
+                 "snapshot ms", "snapshot writes", "rebuild ms"))
+    for backend in sorted(places.PLACES_STORAGES):
+        results = benchmark(places, backend, args)
+        print(row % ((backend,) + tuple("%.2f" % value for value in results)))
+
+
+if __name__ == "__main__":
+    main()
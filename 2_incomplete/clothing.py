@@ -310,6 +310,8 @@ class Clothing(DefaultObject):
         """
         # Set clothing as worn
         self.db.worn = wearstyle
+        if hasattr(wearer, "at_equipment_change"):
+            wearer.at_equipment_change(self)
         
         # Auto-cover appropirate clothing types, as specified above
         to_cover = []
@@ -344,6 +346,8 @@ class Clothing(DefaultObject):
             quiet (bool): If false, does not message the room
         """
         self.db.worn = False
+        if hasattr(wearer, "at_equipment_change"):
+            wearer.at_equipment_change(self)
         remove_message = "%s removes %s." % (wearer, self.name)
         uncovered_list = []
 
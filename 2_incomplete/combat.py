@@ -45,6 +45,7 @@ from evennia import create_script
 from evennia import CmdSet
 from evennia import DefaultCharacter
 from evennia.utils.utils import class_from_module
+from features.spectators import SpectatorMixin
 
 
 COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
@@ -255,8 +256,11 @@ class CmdAttack(COMMAND_DEFAULT_CLASS):
 ##############################################################################
 
 
-class CombatHandler(DefaultScript):
-    """This implements the game handler."""
+class CombatHandler(SpectatorMixin, DefaultScript):
+    """
+    This implements the game handler. msg_all() comes from the
+    SpectatorMixin, which also sends to spectators and the room.
+    """
 
     def at_script_creation(self):
         """
@@ -330,7 +334,7 @@ class CombatHandler(DefaultScript):
         Simply stops combat.
         """
         # Add your flee calculations here.
-        self.msg_all(caller.key + " flees combat.")
+        self.msg_all(caller.key + " flees combat.", highlight=True)
         self.stop()
 
     #########################
@@ -356,7 +360,10 @@ class CombatHandler(DefaultScript):
         # Inflict damage and check if dead.
         if not defender.dmg(inflict_dmg):
             attacker.msg("You down your opponent!")
+            self.msg_all(attacker.key + " downs " + defender.key + "!",
+                         exceptions=[attacker], highlight=True)
             self.stop()
+            return
 
         # Defenders Turn
         self.msg_all(defender.key + " makes a counter attack!")
@@ -366,23 +373,13 @@ class CombatHandler(DefaultScript):
         # Inflict damage and check if dead.
         if not attacker.dmg(inflict_dmg):
             defender.msg("You down your opponent!")
+            self.msg_all(defender.key + " downs " + attacker.key + "!",
+                         exceptions=[defender], highlight=True)
             self.stop()
         
         # If everyone is still alive, repeat cycle.
         
 
-    #########################
-    # Script Utilities
-    #########################
-
-    def msg_all(self, message, exceptions=()):
-        """
-        Send message to all participants
-        """
-        for participant in self.db.participants:
-            if participant not in exceptions:
-                participant.msg(message)
-
     #########################
     # Finish Script
     #########################
@@ -392,6 +389,7 @@ class CombatHandler(DefaultScript):
         Called just before the script is stopped/destroyed.
         Conducts cleanup on each trainer connected to handler.
         """
+        self.clear_spectators()
         for participant in self.db.participants:
             del participant.ndb.combat_handler
             try:
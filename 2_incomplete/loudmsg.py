@@ -15,9 +15,142 @@ set on it's contents.
 entrances = Exit.objects.filter(db_destination=here)
 exits = here.exits
 
+Rather than querying for entrances and walking exits on every loud message,
+ROOM_GRAPH keeps which rooms connect to which in memory, with the inbound and
+outbound edges of every room. It is built the first time it is used, with
+one query for the location and destination ids of every exit and one for the
+rooms they link, and LoudExit keeps it up to date when exits are created,
+deleted, moved or have their destination changed. Use LoudExit (or a child
+of it) for every exit, for example by setting BASE_EXIT_TYPECLASS in
+settings, so no change is missed.
+
 """
 from evennia.utils.utils import make_iter, is_iter
-from evennia typeclasses.rooms import DefaultRoom
+from evennia import DefaultRoom, DefaultExit, ObjectDB
+
+
+class RoomGraph(object):
+    """
+    In-memory adjacency of rooms through exits. Each room maps to the rooms
+    it connects to (outbound) and the rooms connecting to it (inbound),
+    counting the exits making up each edge. The edge of each exit is kept
+    by the exit's id.
+    """
+
+    def __init__(self):
+        self.edges = {}
+        self.outbound = {}
+        self.inbound = {}
+        self.built = False
+
+    def rebuild(self):
+        """
+        Rebuild the graph from every exit in the database. The exits are
+        read as ids only, so no exit is loaded, and the rooms they link
+        are loaded with one more query.
+        """
+        self.edges, self.outbound, self.inbound = {}, {}, {}
+        self.built = True
+        links = list(ObjectDB.objects.filter(
+            db_location__isnull=False, db_destination__isnull=False
+        ).values_list("id", "db_location_id", "db_destination_id"))
+        room_ids = set(room_id for link in links for room_id in link[1:])
+        rooms = dict((room.id, room) for room
+                     in ObjectDB.objects.filter(id__in=room_ids))
+        for exit_id, source_id, destination_id in links:
+            source, destination = rooms.get(source_id), rooms.get(destination_id)
+            if source is not None and destination is not None:
+                self.edges[exit_id] = (source, destination)
+                self._link(source, destination, 1)
+
+    def _link(self, source, destination, count):
+        """Add count exits to the edge from source to destination."""
+        for graph, start, end in ((self.outbound, source, destination),
+                                  (self.inbound, destination, source)):
+            ends = graph.setdefault(start, {})
+            ends[end] = ends.get(end, 0) + count
+            if ends[end] <= 0:
+                del ends[end]
+                if not ends:
+                    del graph[start]
+
+    def update(self, exit):
+        """
+        Move the edge of exit to its current location and destination.
+
+        Args:
+            exit (Object): The exit that was created, moved or relinked.
+        """
+        if not self.built:
+            self.rebuild()
+            return
+        self.discard(exit)
+        source, destination = exit.location, exit.destination
+        if source is not None and destination is not None:
+            self.edges[exit.id] = (source, destination)
+            self._link(source, destination, 1)
+
+    def discard(self, exit):
+        """
+        Remove the edge of exit.
+
+        Args:
+            exit (Object): The exit being deleted or relinked.
+        """
+        edge = self.edges.pop(exit.id, None)
+        if edge is not None:
+            self._link(edge[0], edge[1], -1)
+
+    def exits(self, room):
+        """Returns the rooms room connects to via exits."""
+        if not self.built:
+            self.rebuild()
+        return list(self.outbound.get(room, ()))
+
+    def entrances(self, room):
+        """Returns the rooms connecting to room via exits."""
+        if not self.built:
+            self.rebuild()
+        return list(self.inbound.get(room, ()))
+
+
+ROOM_GRAPH = RoomGraph()
+
+
+class LoudExit(DefaultExit):
+    """
+    An exit keeping ROOM_GRAPH up to date.
+    """
+
+    @property
+    def destination(self):
+        """The exit's destination."""
+        return super().destination
+
+    @destination.setter
+    def destination(self, destination):
+        DefaultExit.destination.fset(self, destination)
+        ROOM_GRAPH.update(self)
+
+    @destination.deleter
+    def destination(self):
+        DefaultExit.destination.fdel(self)
+        ROOM_GRAPH.update(self)
+
+    def at_object_creation(self):
+        """Called once, when the exit is first created."""
+        super().at_object_creation()
+        ROOM_GRAPH.update(self)
+
+    def at_after_move(self, source_location, **kwargs):
+        """Called after the exit has been moved to another room."""
+        super().at_after_move(source_location, **kwargs)
+        ROOM_GRAPH.update(self)
+
+    def at_object_delete(self):
+        """Called just before the exit is deleted."""
+        ROOM_GRAPH.discard(self)
+        return super().at_object_delete()
 
 
 class LoudRoom(DefaultRoom):
@@ -25,6 +158,21 @@ class LoudRoom(DefaultRoom):
     This is the base room object. It's just like any Object except its
     location is always `None`.
     """
+
+    def _msg_rooms(self, rooms, text=None, exclude=None, from_obj=None, **kwargs):
+            """
+            Emit message to all objects inside rooms, other than this room
+            and any excluded.
+            """
+            # we also accept an outcommand on the form (message, {kwargs})
+            is_outcmd = text and is_iter(text)
+            message = text[0] if is_outcmd else text
+            outkwargs = text[1] if is_outcmd and len(text) > 1 else {}
+
+            exclude = make_iter(exclude) if exclude else []
+            for room in set(rooms):
+                if room != self and room not in exclude:
+                    room.msg_contents(text=(message, outkwargs), from_obj=from_obj, **kwargs)
     
     def msg_entrances(self, text=None, exclude=None, from_obj=None, **kwargs):
             """
@@ -44,22 +192,8 @@ class LoudRoom(DefaultRoom):
                 Keyword arguments will be passed on to `obj.msg()` for all
                 messaged objects.
             """
-            # we also accept an outcommand on the form (message, {kwargs})
-            is_outcmd = text and is_iter(text)
-            message = text[0] if is_outcmd else text
-            outkwargs = text[1] if is_outcmd and len(text) > 1 else {}
-    
-            # Collect exit and entrance locations with no repeats.
-            rooms = self.objects.filter(db_destination=self)
-            rooms = list(set(rooms))
-            if self in rooms: rooms.remove(self)
-    
-            if exclude:
-                exclude = make_iter(exclude)
-                rooms = [room for room in rooms if room not in exclude]
-            
-            for room in rooms:
-                room.msg_contents(text=(message, outkwargs), from_obj=from_obj, **kwargs)
+            self._msg_rooms(ROOM_GRAPH.entrances(self), text=text,
+                            exclude=exclude, from_obj=from_obj, **kwargs)
     
     def msg_exits(self, text=None, exclude=None, from_obj=None, **kwargs):
             """
@@ -79,22 +213,8 @@ class LoudRoom(DefaultRoom):
                 Keyword arguments will be passed on to `obj.msg()` for all
                 messaged objects.
             """
-            # we also accept an outcommand on the form (message, {kwargs})
-            is_outcmd = text and is_iter(text)
-            message = text[0] if is_outcmd else text
-            outkwargs = text[1] if is_outcmd and len(text) > 1 else {}
-    
-            # Collect exit and entrance locations with no repeats.
-            rooms = [exit.destination for exit in self.exits]
-            rooms = list(set(rooms))
-            if self in rooms: rooms.remove(self)
-    
-            if exclude:
-                exclude = make_iter(exclude)
-                rooms = [room for room in rooms if room not in exclude]
-            
-            for room in rooms:
-                room.msg_contents(text=(message, outkwargs), from_obj=from_obj, **kwargs)
+            self._msg_rooms(ROOM_GRAPH.exits(self), text=text,
+                            exclude=exclude, from_obj=from_obj, **kwargs)
 
     def msg_connections(self, text=None, exclude=None, from_obj=None, **kwargs):
             """
@@ -114,21 +234,6 @@ class LoudRoom(DefaultRoom):
                 Keyword arguments will be passed on to `obj.msg()` for all
                 messaged objects.
             """
-            # we also accept an outcommand on the form (message, {kwargs})
-            is_outcmd = text and is_iter(text)
-            message = text[0] if is_outcmd else text
-            outkwargs = text[1] if is_outcmd and len(text) > 1 else {}
-    
-            # Collect exit and entrance locations with no repeats.
-            room = []
-            rooms.append(self.objects.filter(db_destination=self))
-            rooms.append([exit.destination for exit in self.exits])
-            rooms = list(set(rooms))
-            if self in rooms: rooms.remove(self)
-    
-            if exclude:
-                exclude = make_iter(exclude)
-                rooms = [room for room in rooms if room not in exclude]
-            
-            for room in rooms:
-                room.msg_contents(text=(message, outkwargs), from_obj=from_obj, **kwargs)
+            rooms = ROOM_GRAPH.entrances(self) + ROOM_GRAPH.exits(self)
+            self._msg_rooms(rooms, text=text, exclude=exclude,
+                            from_obj=from_obj, **kwargs)
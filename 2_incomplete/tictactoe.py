@@ -60,6 +60,7 @@ from evennia import CmdSet
 from trainers.typeclasses import Trainer
 from evennia.utils.utils import class_from_module
 from evennia.utils import evform
+from features.spectators import SpectatorMixin
 
 COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
 
@@ -169,8 +170,11 @@ class CmdTicTacToe(COMMAND_DEFAULT_CLASS):
 ##############################################################################
 
 
-class TicTacToeHandler(DefaultScript):
-    """This implements the game handler."""
+class TicTacToeHandler(SpectatorMixin, DefaultScript):
+    """
+    This implements the game handler. msg_all() comes from the
+    SpectatorMixin, which also sends to spectators and the room.
+    """
 
     def at_script_creation(self):
         """
@@ -446,21 +450,10 @@ class TicTacToeHandler(DefaultScript):
                     # Find the winner
                     winner = list(self.db.participants.keys())[list(self.db.participants.values()).index(positions[line[0]])]
                     winner.msg("You have one Tic Tac Toe!")
-                    self.msg_all(winner.key + " has won Tic Tac Toe.", [winner])
+                    self.msg_all(winner.key + " has won Tic Tac Toe.", [winner],
+                                 highlight=True)
                     self.stop()
 
-    #########################
-    # Script Utilities
-    #########################
-
-    def msg_all(self, message, exceptions=()):
-        """
-        Send message to all participants
-        """
-        for participant in self.db.participants:
-            if participant not in exceptions:
-                participant.msg(message)
-
     #########################
     # Finish Script
     #########################
@@ -470,6 +463,7 @@ class TicTacToeHandler(DefaultScript):
         Called just before the script is stopped/destroyed.
         Conducts cleanup on each trainer connected to handler.
         """
+        self.clear_spectators()
         for participant in self.db.participants:
             self._cleanup_participant(participant)
 
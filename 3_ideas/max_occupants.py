@@ -1,4 +1,8 @@
 """
 Room with an occupancy limit and an exit object that respects that.
 Maybe do it all within the room and send them back? That sounds better to me.
+
+Limits on Places (per place and per room, with overflow places) are done in
+1_testing/places.py, counted by PLACE_OCCUPANTS. A room limit could keep
+a similar counter from at_object_receive/at_object_leave.
 """
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Local Channels - Needs Testing
+
+A channel that only works within one location - the TV in the lounge, the
+tannoy of a ship's bridge. As suggested in 3_ideas/msgtags.py this is a
+Channel subclass people subscribe to only while they are in the room with
+it, and are unsubscribed from as they leave.
+
+Membership is kept in memory by LOCAL_CHANNELS rather than in the channel's
+database subscriptions. Channels keep a set of their listeners and every
+listener keeps a back-reference to the channels it listens to, so the room's
+at_object_leave() unsubscribes a leaving character in O(1) per channel it
+listens to. Nothing scans subscribers on a timer and sending checks nobody's
+location. Memberships do not survive a reload; listeners re-join.
+
+INSTALLATION:
+Add the LocalChannelRoomMixin to your Room typeclass, before the parent:
+
+    from features.local_channels import LocalChannelRoomMixin
+
+    class Room(LocalChannelRoomMixin, DefaultRoom):
+        pass
+
+USAGE:
+    from features.local_channels import create_local_channel
+
+    channel = create_local_channel("lounge tv", lounge)
+    channel.connect(caller)          # Fails if caller isn't in the lounge.
+    channel.msg("The red team rushes the flag!")
+
+"""
+
+import weakref
+from evennia import create_channel
+from typeclasses.channels import Channel
+from features.multicast import multicast
+
+# -----------------------------------------------------------------------------
+# Membership Index
+# -----------------------------------------------------------------------------
+
+
+class LocalChannelIndex(object):
+    """
+    In-memory membership of local channels, with back-references from
+    every listener to the channels it listens to.
+    """
+
+    def __init__(self):
+        self.members = weakref.WeakKeyDictionary()
+        self.joined = weakref.WeakKeyDictionary()
+
+    def connect(self, channel, subscriber):
+        """Add subscriber to channel."""
+        self.members.setdefault(channel, weakref.WeakSet()).add(subscriber)
+        self.joined.setdefault(subscriber, weakref.WeakSet()).add(channel)
+
+    def disconnect(self, channel, subscriber):
+        """Remove subscriber from channel."""
+        members = self.members.get(channel)
+        if members is not None:
+            members.discard(subscriber)
+        joined = self.joined.get(subscriber)
+        if joined is not None:
+            joined.discard(channel)
+            if not joined:
+                del self.joined[subscriber]
+
+    def listeners(self, channel):
+        """
+        Returns the live set of listeners of channel. The returned set
+        should not be modified.
+        """
+        return self.members.get(channel, frozenset())
+
+    def channels(self, subscriber):
+        """Returns a list of the local channels subscriber listens to."""
+        return list(self.joined.get(subscriber, ()))
+
+    def leave(self, subscriber, location):
+        """
+        Disconnect subscriber from every channel it listens to that is
+        bound to location. Having left the location, pre_leave_channel()
+        gets no say, only post_leave_channel() is called.
+        """
+        for channel in self.channels(subscriber):
+            if channel.location == location:
+                self.disconnect(channel, subscriber)
+                channel.post_leave_channel(subscriber)
+
+    def clear(self, channel):
+        """Disconnect every listener from channel."""
+        for subscriber in list(self.listeners(channel)):
+            self.disconnect(channel, subscriber)
+        self.members.pop(channel, None)
+
+
+LOCAL_CHANNELS = LocalChannelIndex()
+
+# -----------------------------------------------------------------------------
+# Local Channel
+# -----------------------------------------------------------------------------
+
+
+class LocalChannel(Channel):
+    """
+    A channel bound to db.location. Only objects in that location can
+    connect, and they are disconnected as they leave it.
+    """
+
+    @property
+    def location(self):
+        """The location the channel is bound to."""
+        return self.attributes.get("location")
+
+    def has_connection(self, subscriber):
+        """
+        Checks so this account is actually listening to this channel.
+        """
+        return subscriber in LOCAL_CHANNELS.listeners(self)
+
+    def connect(self, subscriber, **kwargs):
+        """
+        Connect the user to this channel, if they are in its location.
+
+        Returns:
+            success (bool): Whether the subscriber was connected.
+        """
+        if subscriber.location != self.location:
+            return False
+        if not self.pre_join_channel(subscriber):
+            return False
+        LOCAL_CHANNELS.connect(self, subscriber)
+        self.post_join_channel(subscriber)
+        return True
+
+    def disconnect(self, subscriber, **kwargs):
+        """
+        Disconnect entity from this channel.
+
+        Returns:
+            success (bool): Whether the subscriber was listening.
+        """
+        if not self.has_connection(subscriber):
+            return False
+        if not self.pre_leave_channel(subscriber):
+            return False
+        LOCAL_CHANNELS.disconnect(self, subscriber)
+        self.post_leave_channel(subscriber)
+        return True
+
+    def distribute_message(self, msgobj, online=False, **kwargs):
+        """
+        Send the message to the listeners, all of which are in the
+        channel's location.
+        """
+        multicast(LOCAL_CHANNELS.listeners(self), msgobj.message,
+                  options={"from_channel": self.id})
+
+    def delete(self):
+        """Deletes the channel, disconnecting its listeners."""
+        LOCAL_CHANNELS.clear(self)
+        return super().delete()
+
+
+def create_local_channel(key, location, **kwargs):
+    """
+    Create a LocalChannel bound to location.
+
+    Args:
+        key (str): Name of the channel.
+        location (Object): Where listeners must be.
+    Kwargs:
+        Passed on to evennia.create_channel().
+    """
+    channel = create_channel(key, typeclass=LocalChannel, **kwargs)
+    channel.attributes.add("location", location)
+    return channel
+
+# -----------------------------------------------------------------------------
+# Room Mixin
+# -----------------------------------------------------------------------------
+
+
+class LocalChannelRoomMixin(object):
+    """
+    A mixin to put on Room objects. Disconnects objects leaving the room
+    from the local channels bound to it.
+    """
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """
+        Called just before an object leaves from inside this object.
+        """
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        LOCAL_CHANNELS.leave(moved_obj, self)
@@ -0,0 +1,124 @@
+"""
+Multicast - Needs Testing
+
+Messaging a group with `obj.msg()` runs the whole msg pipeline once per
+listener: the text is type checked and packed into kwargs again, the
+listener's sessions are looked up, and every session is sent separately.
+A busy place or room pays all of that for each person in it.
+
+Here the payload is prepared once, the recipients are resolved to a
+de-duplicated set of sessions (an account puppeting two listeners, or a
+listener connected twice, is only sent to once per session) and the same
+kwargs are handed to every session.
+
+Evennia's AMP connection has no multi-recipient command, every outgoing
+message names a single session, so "one message" here means one prepared
+payload shipped to each session in a single pass. Sessions are grouped by
+the portal connection they go out on, so a future portal-side command can
+take each group as one message. The coalescing ServerSession in
+server/conf/serversession.py also merges multicasts in the same reactor tick
+into fewer sends per session.
+
+NOTE: Multicasting skips the msg hooks of the recipients - at_msg_receive()
+and any overridden msg() (like the radios in 2_incomplete/radio.py) are not
+called. The sender's at_msg_send() isn't called either, so the from_obj of
+MulticastRoomMixin.msg_contents() is dropped. Use plain msg() for objects
+relying on those.
+
+USAGE:
+    from features.multicast import multicast, MulticastRoomMixin
+
+    multicast(occupants, "Hi Guys!", exclude=[caller])
+
+    class Room(MulticastRoomMixin, DefaultRoom):
+        pass
+
+"""
+
+from evennia.utils.utils import to_str, make_iter
+
+# -----------------------------------------------------------------------------
+# Multicast
+# -----------------------------------------------------------------------------
+
+
+def group_sessions(recipients, exclude=None):
+    """
+    Resolve recipients to their sessions, grouped by portal connection.
+
+    Args:
+        recipients (iterable): Objects or accounts to message.
+        exclude (Object or iterable, optional): Recipients not to send to.
+
+    Returns:
+        groups (dict): {portal connection: {sessid: session}}.
+    """
+    exclude = make_iter(exclude) if exclude else ()
+    groups = {}
+    for recipient in recipients:
+        if recipient in exclude:
+            continue
+        for session in recipient.sessions.all():
+            server = getattr(session.sessionhandler, "server", None)
+            portal = getattr(server, "amp_protocol", None)
+            groups.setdefault(portal, {})[session.sessid] = session
+    return groups
+
+
+def multicast(recipients, text=None, exclude=None, **kwargs):
+    """
+    Send one message to many recipients, preparing it only once.
+
+    Args:
+        recipients (iterable): Objects or accounts to message.
+        text (str or tuple, optional): Message to send.
+        exclude (Object or iterable, optional): Recipients not to send to.
+    Kwargs:
+        Any other send commands, as for `obj.msg()`.
+
+    Returns:
+        sent (int): The number of sessions sent to.
+    """
+    groups = group_sessions(recipients, exclude)
+    if not groups:
+        return 0
+
+    # Prepare the payload once, the same way msg() does.
+    if text is not None:
+        if not isinstance(text, (str, tuple)):
+            try:
+                text = to_str(text)
+            except Exception:
+                text = repr(text)
+        kwargs["text"] = text
+    kwargs.setdefault("options", None)
+
+    sent = 0
+    for sessions in groups.values():
+        for session in sessions.values():
+            session.data_out(**kwargs)
+        sent += len(sessions)
+    return sent
+
+# -----------------------------------------------------------------------------
+# Room Mixin
+# -----------------------------------------------------------------------------
+
+
+class MulticastRoomMixin(object):
+    """
+    A mixin to put on Room objects so msg_contents() multicasts. Messages
+    using a mapping are formatted per receiver and keep the default path.
+    """
+
+    def msg_contents(self, text=None, exclude=None, from_obj=None,
+                     mapping=None, **kwargs):
+        """
+        Emits a message to all objects inside this object. from_obj is only
+        used by messages with a mapping, multicasts don't call msg hooks.
+        """
+        if mapping:
+            return super().msg_contents(text, exclude=exclude,
+                                        from_obj=from_obj, mapping=mapping,
+                                        **kwargs)
+        multicast(self.contents, text, exclude=exclude, **kwargs)
@@ -0,0 +1,289 @@
+"""
+Noise Levels - Needs Testing
+
+Busy rooms get noisy. Players choose how much detail they see of each
+category of message - combat, ambience, social - from none, brief or full,
+like the room detail settings of older MUDs.
+
+Rather than checking every receiver's preference (or tags, as discussed in
+3_ideas/msgtags.py) for every message, each room keeps its puppeted
+characters in buckets by category and chosen level. The buckets are only
+updated when a character is puppeted, unpuppeted, moves or changes a
+preference, so sending a message picks the matching buckets and sends to
+their members without looking at anyone's preferences.
+
+Messages are sent at a level: "brief" messages are the headline and reach
+both the brief and full buckets, "full" messages are the detail and only
+reach the full bucket. Characters with a category set to none get neither.
+Only puppeted characters are in the buckets, so other objects in the room
+don't receive categorised messages.
+
+INSTALLATION:
+Add the mixins to your typeclasses, before the parent:
+
+    from features.noise_levels import NoiseLevelMixin, NoiseRoomMixin
+
+    class Character(NoiseLevelMixin, DefaultCharacter):
+        pass
+
+    class Room(NoiseRoomMixin, DefaultRoom):
+        pass
+
+Rebuild the buckets in at_server_start() in server/conf/at_server_startstop.py
+and add CmdNoise to the CharacterCmdSet in commands/default_cmdsets.py.
+
+USAGE:
+    room.msg_contents("Steel rings on steel.", noise=("combat", "full"))
+    room.msg_contents("A fight breaks out!", noise=("combat", "brief"))
+
+"""
+
+from evennia.utils.utils import class_from_module
+from django.conf import settings
+from features.multicast import multicast
+COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
+
+# Options start here.
+# Categories of message players can set a noise level for.
+NOISE_CATEGORIES = ("combat", "ambience", "social")
+# The noise levels, from least to most detail.
+NOISE_LEVELS = ("none", "brief", "full")
+# Level of every category a character hasn't chosen one for.
+NOISE_DEFAULT_LEVEL = "full"
+
+# -----------------------------------------------------------------------------
+# Noise Index
+# -----------------------------------------------------------------------------
+
+
+def noise_levels(character):
+    """
+    Returns the {category: level} preferences of character, defaults
+    included.
+    """
+    levels = dict.fromkeys(NOISE_CATEGORIES, NOISE_DEFAULT_LEVEL)
+    levels.update(character.db.noise_levels or {})
+    return levels
+
+
+class NoiseIndex(object):
+    """
+    Maps rooms to buckets of puppeted characters by (category, level).
+    """
+
+    def __init__(self):
+        self.rooms = {}
+        self.locations = {}
+
+    def add(self, character, location):
+        """
+        Bucket a puppeted character at location by its preferences, moving
+        it out of any room it was previously bucketed in.
+
+        Args:
+            character (Object): The puppeted character.
+            location (Object): Where the character now is. If None the
+                character is removed from the index.
+        """
+        self.remove(character)
+        if location is None:
+            return
+        levels = noise_levels(character)
+        self.locations[character] = (location, levels)
+        buckets = self.rooms.setdefault(location, {})
+        for bucket in levels.items():
+            buckets.setdefault(bucket, set()).add(character)
+
+    def remove(self, character):
+        """
+        Remove a character from the index.
+
+        Args:
+            character (Object): The character no longer puppeted.
+        """
+        location, levels = self.locations.pop(character, (None, None))
+        if location is None:
+            return
+        buckets = self.rooms.get(location, {})
+        for bucket in levels.items():
+            receivers = buckets.get(bucket)
+            if receivers is not None:
+                receivers.discard(character)
+                if not receivers:
+                    del buckets[bucket]
+        if not buckets:
+            self.rooms.pop(location, None)
+
+    def update(self, character):
+        """Re-bucket a character after its preferences have changed."""
+        if character in self.locations:
+            self.add(character, self.locations[character][0])
+
+    def is_tracked(self, character):
+        """Returns whether character is in the index."""
+        return character in self.locations
+
+    def receivers(self, room, category, level):
+        """
+        Returns the buckets of room that should receive a message of
+        category sent at level.
+        """
+        buckets = self.rooms.get(room)
+        if not buckets:
+            return []
+        wanted = NOISE_LEVELS[max(NOISE_LEVELS.index(level), 1):]
+        return [buckets[(category, want)] for want in wanted
+                if (category, want) in buckets]
+
+    def msg_contents(self, room, text, category, level="full", exclude=None,
+                     **kwargs):
+        """
+        Message the puppeted characters in room who want messages of
+        category at level.
+
+        Args:
+            room (Object): The room to message.
+            text (str or tuple): Message to send.
+            category (str): One of NOISE_CATEGORIES.
+            level (str, optional): "brief" or "full".
+            exclude (list, optional): Objects not to send to.
+        Kwargs:
+            Keyword arguments will be passed on to the sessions.
+        """
+        for receivers in self.receivers(room, category, level):
+            multicast(receivers, text, exclude=exclude, **kwargs)
+
+    def rebuild(self):
+        """
+        Rebuild the index from the characters puppeted right now. Used at
+        server start, as puppets are not re-puppeted over a reload.
+        """
+        from evennia.server.sessionhandler import SESSIONS
+        self.clear()
+        for session in SESSIONS.values():
+            puppet = session.puppet
+            if isinstance(puppet, NoiseLevelMixin):
+                self.add(puppet, puppet.location)
+
+    def clear(self):
+        """Empty the index."""
+        self.rooms = {}
+        self.locations = {}
+
+
+NOISE = NoiseIndex()
+
+# -----------------------------------------------------------------------------
+# Mixins
+# -----------------------------------------------------------------------------
+
+
+class NoiseLevelMixin(object):
+    """
+    A mixin to put on Character objects. Keeps NOISE up to date as the
+    character is puppeted, unpuppeted, moved and changes preferences.
+    """
+
+    def set_noise_level(self, category, level):
+        """
+        Set how much detail of category the character sees.
+
+        Args:
+            category (str): One of NOISE_CATEGORIES.
+            level (str): One of NOISE_LEVELS.
+        """
+        levels = dict(self.db.noise_levels or {})
+        levels[category] = level
+        self.db.noise_levels = levels
+        NOISE.update(self)
+
+    def at_post_puppet(self, **kwargs):
+        """
+        Called just after puppeting has completed. Buckets the character
+        at its restored location.
+        """
+        super().at_post_puppet(**kwargs)
+        NOISE.add(self, self.location)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        """
+        Called just after the Account successfully disconnected from this
+        object. Removes the character once its last session has left.
+        """
+        super().at_post_unpuppet(account, session=session, **kwargs)
+        if not self.sessions.count():
+            NOISE.remove(self)
+
+    def at_after_move(self, source_location, **kwargs):
+        """
+        Called after move has completed. Moves the character between rooms
+        in the index if it is puppeted.
+        """
+        super().at_after_move(source_location, **kwargs)
+        if NOISE.is_tracked(self):
+            NOISE.add(self, self.location)
+
+
+class NoiseRoomMixin(object):
+    """
+    A mixin to put on Room objects. msg_contents() takes a noise keyword of
+    (category, level) to send only to the matching buckets.
+    """
+
+    def msg_contents(self, text=None, exclude=None, from_obj=None,
+                     mapping=None, noise=None, **kwargs):
+        """
+        Emits a message to all objects inside this object.
+
+        Kwargs:
+            noise (tuple, optional): (category, level) of the message. If
+                given the message only goes to characters wanting it.
+        """
+        if noise is None:
+            return super().msg_contents(text, exclude=exclude,
+                                        from_obj=from_obj, mapping=mapping,
+                                        **kwargs)
+        NOISE.msg_contents(self, text, noise[0], noise[1], exclude=exclude,
+                           **kwargs)
+
+# -----------------------------------------------------------------------------
+# Commands
+# -----------------------------------------------------------------------------
+
+
+class CmdNoise(COMMAND_DEFAULT_CLASS):
+    """
+    Set how much detail you see of busy rooms.
+
+    Usage:
+        noise
+        noise <category> <none||brief||full>
+
+    With no argument shows your current settings.
+    """
+    key = "noise"
+    locks = "cmd:all()"
+    help_category = "General"
+
+    def func(self):
+        """Actions undertaken by the Command"""
+        caller = self.caller
+        args = self.args.strip().lower().split()
+        usage = "Usage: noise <%s> <%s>" % ("||".join(NOISE_CATEGORIES),
+                                           "||".join(NOISE_LEVELS))
+
+        # No argument: show current settings.
+        if not args:
+            levels = noise_levels(caller)
+            caller.msg("Your noise levels: %s\n%s" % (
+                ", ".join("%s %s" % (category, levels[category])
+                          for category in NOISE_CATEGORIES), usage))
+            return
+
+        if (len(args) != 2 or args[0] not in NOISE_CATEGORIES
+                or args[1] not in NOISE_LEVELS):
+            caller.msg(usage)
+            return
+
+        caller.set_noise_level(*args)
+        caller.msg("You now see %s of %s." % (args[1], args[0]))
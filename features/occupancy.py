@@ -0,0 +1,189 @@
+"""
+Occupancy Index - Needs Testing
+
+Finding out which rooms have players in them normally means walking every
+session in SESSIONS and collecting the location of each puppet. Anything
+that fires on a timer for inhabited rooms (ambience, weather, broadcasts)
+then pays O(sessions) every interval.
+
+Here we keep a live, in-memory map of room -> set of puppeted characters.
+It is maintained from the puppet and move hooks of characters, so asking
+for the inhabited rooms costs O(inhabited rooms) and asking for the
+occupants of a room is a dictionary lookup. Nothing is stored in the
+database, the index is rebuilt from the connected sessions when the server
+starts.
+
+Rooms can react to becoming inhabited or empty by defining the
+at_room_inhabited() and at_room_vacated() hooks, which the index calls when
+the first puppeted character arrives and the last one leaves or logs off.
+
+INSTALLATION:
+Add the OccupancyMixin to your Character typeclass, before the parent:
+
+    from features.occupancy import OccupancyMixin
+
+    class Character(OccupancyMixin, DefaultCharacter):
+        pass
+
+Rebuild the index in at_server_start() in server/conf/at_server_startstop.py:
+
+    from features.occupancy import OCCUPANCY
+    OCCUPANCY.rebuild()
+
+USAGE:
+    from features.occupancy import OCCUPANCY
+
+    OCCUPANCY.inhabited_rooms()      # List of rooms with puppets in them.
+    OCCUPANCY.occupants(room)        # Set of puppeted characters in room.
+    OCCUPANCY.msg_occupants(room, "The bells toll.")
+
+"""
+
+# -----------------------------------------------------------------------------
+# Occupancy Index
+# -----------------------------------------------------------------------------
+
+
+class OccupancyIndex(object):
+    """
+    Maps rooms to the puppeted characters inside them, and characters back
+    to the room they are indexed under.
+    """
+
+    def __init__(self):
+        self.rooms = {}
+        self.locations = {}
+
+    def add(self, character, location):
+        """
+        Index a puppeted character at location, moving it out of any room
+        it was previously indexed under.
+
+        Args:
+            character (Object): The puppeted character.
+            location (Object): Where the character now is. If None the
+                character is removed from the index.
+        """
+        if self.locations.get(character) == location:
+            return
+        self.remove(character)
+        if location is None:
+            return
+        self.locations[character] = location
+        occupants = self.rooms.get(location)
+        if occupants is None:
+            self.rooms[location] = set([character])
+            if hasattr(location, "at_room_inhabited"):
+                location.at_room_inhabited()
+        else:
+            occupants.add(character)
+
+    def remove(self, character):
+        """
+        Remove a character from the index.
+
+        Args:
+            character (Object): The character no longer puppeted.
+        """
+        location = self.locations.pop(character, None)
+        if location is None:
+            return
+        occupants = self.rooms.get(location)
+        if occupants is not None:
+            occupants.discard(character)
+            if not occupants:
+                del self.rooms[location]
+                if hasattr(location, "at_room_vacated"):
+                    location.at_room_vacated()
+
+    def is_tracked(self, character):
+        """Returns whether character is in the index."""
+        return character in self.locations
+
+    def is_inhabited(self, room):
+        """Returns whether room has puppeted characters in it."""
+        return room in self.rooms
+
+    def occupants(self, room):
+        """
+        Returns the set of puppeted characters in room. The returned set is
+        live and should not be modified.
+        """
+        return self.rooms.get(room, frozenset())
+
+    def inhabited_rooms(self):
+        """Returns a list of every room with puppeted characters in it."""
+        return list(self.rooms)
+
+    def msg_occupants(self, room, text=None, exclude=None, **kwargs):
+        """
+        Message only the puppeted characters in room.
+
+        Args:
+            room (Object): The room to message.
+            text (str or tuple): Message to send.
+            exclude (list, optional): Objects not to send to.
+        Kwargs:
+            Keyword arguments will be passed on to `obj.msg()`.
+        """
+        exclude = exclude or ()
+        for occupant in list(self.occupants(room)):
+            if occupant not in exclude:
+                occupant.msg(text=text, **kwargs)
+
+    def rebuild(self):
+        """
+        Rebuild the index from the characters puppeted right now. Used at
+        server start, as puppets are not re-puppeted over a reload.
+        """
+        from evennia.server.sessionhandler import SESSIONS
+        self.clear()
+        for session in SESSIONS.values():
+            puppet = session.puppet
+            if isinstance(puppet, OccupancyMixin):
+                self.add(puppet, puppet.location)
+
+    def clear(self):
+        """Empty the index."""
+        self.rooms = {}
+        self.locations = {}
+
+
+OCCUPANCY = OccupancyIndex()
+
+# -----------------------------------------------------------------------------
+# Character Mixin
+# -----------------------------------------------------------------------------
+
+
+class OccupancyMixin(object):
+    """
+    A mixin to put on Character objects. Keeps OCCUPANCY up to date as the
+    character is puppeted, unpuppeted and moved.
+    """
+
+    def at_post_puppet(self, **kwargs):
+        """
+        Called just after puppeting has completed. Indexes the character
+        at its restored location.
+        """
+        super().at_post_puppet(**kwargs)
+        OCCUPANCY.add(self, self.location)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        """
+        Called just after the Account successfully disconnected from this
+        object. Removes the character once its last session has left.
+        """
+        super().at_post_unpuppet(account, session=session, **kwargs)
+        if not self.sessions.count():
+            OCCUPANCY.remove(self)
+
+    def at_after_move(self, source_location, **kwargs):
+        """
+        Called after move has completed. Moves the character between rooms
+        in the index if it is puppeted.
+        """
+        super().at_after_move(source_location, **kwargs)
+        if OCCUPANCY.is_tracked(self):
+            OCCUPANCY.add(self, self.location)
@@ -0,0 +1,225 @@
+"""
+Spectators - Needs Testing
+
+Script-based game handlers, like the CombatHandler of 2_incomplete/combat.py
+and the TicTacToeHandler of 2_incomplete/tictactoe.py, only message their
+participants. Bystanders either see nothing or, if handlers were to use
+msg_contents(), get the whole blow by blow of every fight in the room.
+
+The SpectatorMixin gives game handlers two audiences:
+
+    Spectators  - Characters who chose to watch a game with the spectate
+                  command. They get the full stream, the same as the
+                  participants.
+    The room    - Everyone else where the participants are. They only get
+                  highlights, messages sent with msg_all(msg, highlight=True)
+                  such as crits, KOs and wins.
+
+Highlights are not sent as they happen. HIGHLIGHTS collects them per room
+and sends each room one coalesced line every SPECTATOR_TICK seconds, holding
+at most SPECTATOR_MAX_HIGHLIGHTS highlights per room per tick and summarising
+the rest. However busy a brawl gets, bystanders get at most one message per
+tick.
+
+INSTALLATION:
+Add the SpectatorMixin to a game handler, before DefaultScript, remove its
+own msg_all() and call clear_spectators() from its at_stop():
+
+    from features.spectators import SpectatorMixin
+
+    class CombatHandler(SpectatorMixin, DefaultScript):
+        ...
+
+Add CmdSpectate to the CharacterCmdSet in commands/default_cmdsets.py.
+
+"""
+
+import weakref
+from evennia.utils.utils import class_from_module
+from django.conf import settings
+from features.multicast import multicast
+COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
+
+# Options start here.
+# Seconds between sending each room its coalesced highlights.
+SPECTATOR_TICK = 2
+# Highlights shown per room per tick, the rest are only counted.
+SPECTATOR_MAX_HIGHLIGHTS = 3
+# The ndb attributes participants keep their game handler in.
+SPECTATOR_HANDLER_ATTRS = ("combat_handler", "game_handler")
+
+# -----------------------------------------------------------------------------
+# Highlights
+# -----------------------------------------------------------------------------
+
+
+class HighlightQueue(object):
+    """
+    Collects game highlights per room and sends each room one coalesced
+    message per tick.
+    """
+
+    def __init__(self, tick=SPECTATOR_TICK, max_highlights=SPECTATOR_MAX_HIGHLIGHTS):
+        self.tick = tick
+        self.max_highlights = max_highlights
+        self.rooms = {}
+        self.ticker = None
+
+    def add(self, room, msg, exclude=()):
+        """
+        Queue a highlight for room.
+
+        Args:
+            room (Object): The room to show the highlight in.
+            msg (str): The highlight.
+            exclude (iterable, optional): Who already saw it, like the
+                participants and spectators of the game.
+        """
+        if room is None:
+            return
+        msgs, excluded = self.rooms.setdefault(room, ([], set()))
+        msgs.append(msg)
+        excluded.update(exclude)
+        self._start()
+
+    def flush(self):
+        """
+        Send every room its highlights since the last tick as one message.
+        """
+        rooms, self.rooms = self.rooms, {}
+        for room, (msgs, excluded) in rooms.items():
+            shown = msgs[:self.max_highlights]
+            if len(msgs) > len(shown):
+                shown.append("(and %i more)" % (len(msgs) - len(shown)))
+            multicast(room.contents, " ".join(shown), exclude=excluded)
+        if not self.rooms:
+            self._stop()
+
+    def _start(self):
+        """Start the reactor loop if it isn't already running."""
+        if self.ticker is None:
+            from twisted.internet.task import LoopingCall
+            self.ticker = LoopingCall(self.flush)
+            self.ticker.start(self.tick, now=False)
+
+    def _stop(self):
+        """Stop the reactor loop while there is nothing to send."""
+        if self.ticker is not None:
+            if self.ticker.running:
+                self.ticker.stop()
+            self.ticker = None
+
+
+HIGHLIGHTS = HighlightQueue()
+
+# -----------------------------------------------------------------------------
+# Game Handler Mixin
+# -----------------------------------------------------------------------------
+
+
+class SpectatorMixin(object):
+    """
+    A mixin to put on script-based game handlers with db.participants.
+    """
+
+    def spectators(self):
+        """Returns the live set of spectators of the game."""
+        if self.ndb.spectators is None:
+            self.ndb.spectators = weakref.WeakSet()
+        return self.ndb.spectators
+
+    def add_spectator(self, spectator):
+        """Let spectator watch the full stream of the game."""
+        self.spectators().add(spectator)
+        spectator.ndb.spectating = self
+
+    def remove_spectator(self, spectator):
+        """Stop spectator watching the game."""
+        self.spectators().discard(spectator)
+        if spectator.ndb.spectating == self:
+            del spectator.ndb.spectating
+
+    def clear_spectators(self):
+        """Stop everyone watching the game. Call from at_stop()."""
+        for spectator in list(self.spectators()):
+            spectator.msg("The game you were watching has ended.")
+            self.remove_spectator(spectator)
+
+    def msg_all(self, message, exceptions=(), highlight=False):
+        """
+        Send message to all participants and spectators.
+
+        Args:
+            message (str): The message.
+            exceptions (iterable, optional): Participants not to send to.
+            highlight (bool, optional): Also show message to the rest of
+                the room the participants are in, coalesced per tick.
+        """
+        participants = list(self.db.participants)
+        for participant in participants:
+            if participant not in exceptions:
+                participant.msg(message)
+        spectators = self.spectators()
+        multicast(spectators, message, exclude=participants)
+
+        if highlight:
+            watching = set(participants) | set(spectators)
+            for room in set(participant.location for participant in participants):
+                HIGHLIGHTS.add(room, message, exclude=watching)
+
+# -----------------------------------------------------------------------------
+# Commands
+# -----------------------------------------------------------------------------
+
+
+class CmdSpectate(COMMAND_DEFAULT_CLASS):
+    """
+    Watch a game or fight.
+
+    Usage:
+        spectate <player>
+        spectate/stop
+
+    Spectating shows you everything happening in the game the player is
+    part of, rather than only the highlights everyone nearby sees.
+    """
+    key = "spectate"
+    aliases = ["spec"]
+    switch_options = ("stop",)
+    locks = "cmd:all()"
+    help_category = "General"
+
+    def func(self):
+        """Actions undertaken by the Command"""
+        caller = self.caller
+
+        if "stop" in self.switches:
+            handler = caller.ndb.spectating
+            if handler is None:
+                caller.msg("You aren't watching anything.")
+                return
+            handler.remove_spectator(caller)
+            caller.msg("You stop watching.")
+            return
+
+        if not self.args:
+            caller.msg("Usage: spectate <player> or spectate/stop")
+            return
+        target = caller.search(self.args)
+        if not target:
+            return
+
+        handler = None
+        for attr in SPECTATOR_HANDLER_ATTRS:
+            handler = getattr(target.ndb, attr, None)
+            if isinstance(handler, SpectatorMixin):
+                break
+            handler = None
+        if handler is None:
+            caller.msg("%s isn't in a game you can watch." % target.key)
+            return
+
+        if caller.ndb.spectating is not None:
+            caller.ndb.spectating.remove_spectator(caller)
+        handler.add_spectator(caller)
+        caller.msg("You start watching %s." % target.key)
@@ -0,0 +1,239 @@
+"""
+Subscriptions - Needs Testing
+
+Chatty objects - TVs, radios, expressive NPCs - would flood their rooms if
+they sent everything to msg_contents(). Instead players subscribe to the
+services the object offers ("watch TV", "listen radio") and the object
+sends the detail only to its subscribers, emitting the odd flavour message
+to the room.
+
+This is the central SubscriptionHandler from the discussion in
+3_ideas/msgtags.py. Senders register the services they offer and an
+optional auto_unsub_checker. Subscribers are held in memory as weak
+references, per sender and service, with a back-reference from every
+subscriber to its subscriptions so unsubscribing never searches. Nothing
+is stored in the database and sending is a set iteration with no queries.
+
+auto_unsub_checkers are not run when sending. They are run over every
+subscription in one batch every SUBSCRIPTION_CHECK_INTERVAL seconds, so
+someone who wandered away from the TV stops getting its messages within
+that time.
+
+USAGE:
+    from features.subscriptions import SUBSCRIPTIONS, left_location
+
+    SUBSCRIPTIONS.add_sender(tv, ["watch"], auto_unsub_checker=left_location)
+    SUBSCRIPTIONS.subscribe(caller, tv, "watch")
+    SUBSCRIPTIONS.msg(tv, "watch", "The red team rushes the flag!")
+    SUBSCRIPTIONS.unsubscribe(caller, tv)
+
+Add CmdWatch to the CharacterCmdSet in commands/default_cmdsets.py to let
+players "watch" and "listen" to senders.
+
+"""
+
+import weakref
+from evennia.utils.utils import class_from_module
+from django.conf import settings
+from features.multicast import multicast
+COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
+
+# Options start here.
+# Seconds between batched runs of the auto_unsub_checkers.
+SUBSCRIPTION_CHECK_INTERVAL = 10
+
+# -----------------------------------------------------------------------------
+# Subscription Handler
+# -----------------------------------------------------------------------------
+
+
+def left_location(sender, subscriber):
+    """
+    An auto_unsub_checker removing subscribers no longer in the same
+    location as the sender.
+    """
+    return subscriber.location != sender.location
+
+
+class SubscriptionHandler(object):
+    """
+    Keeps the subscribers of every sender and service in memory.
+    """
+
+    def __init__(self, interval=SUBSCRIPTION_CHECK_INTERVAL):
+        self.interval = interval
+        self.senders = weakref.WeakKeyDictionary()
+        self.checkers = weakref.WeakKeyDictionary()
+        self.subscriptions = weakref.WeakKeyDictionary()
+        self.ticker = None
+
+    def add_sender(self, sender, services, auto_unsub_checker=None):
+        """
+        Register sender and the services it offers.
+
+        Args:
+            sender (Object): The object sending messages.
+            services (iterable): Names of the services, like "watch".
+            auto_unsub_checker (callable, optional): Called in batches as
+                checker(sender, subscriber), returning True when the
+                subscriber should be unsubscribed.
+        """
+        offered = self.senders.setdefault(sender, {})
+        for service in services:
+            offered.setdefault(service, weakref.WeakSet())
+        if auto_unsub_checker is None:
+            self.checkers.pop(sender, None)
+        else:
+            self.checkers[sender] = auto_unsub_checker
+            self._start()
+
+    def remove_sender(self, sender):
+        """Unsubscribe everyone from sender and forget it."""
+        for service, subscribers in list(self.senders.get(sender, {}).items()):
+            for subscriber in list(subscribers):
+                self.unsubscribe(subscriber, sender, service)
+        self.senders.pop(sender, None)
+        self.checkers.pop(sender, None)
+
+    def services(self, sender):
+        """Returns the names of the services sender offers."""
+        return list(self.senders.get(sender, ()))
+
+    def subscribe(self, subscriber, sender, service):
+        """
+        Subscribe subscriber to a service of sender.
+
+        Returns:
+            subscribed (bool): False if sender doesn't offer service.
+        """
+        subscribers = self.senders.get(sender, {}).get(service)
+        if subscribers is None:
+            return False
+        subscribers.add(subscriber)
+        self.subscriptions.setdefault(subscriber, set()).add((sender, service))
+        return True
+
+    def unsubscribe(self, subscriber, sender=None, service=None):
+        """
+        Unsubscribe subscriber from a service of sender, from every service
+        of sender if service is None, or from everything if sender is None.
+        """
+        subscriptions = self.subscriptions.get(subscriber)
+        if not subscriptions:
+            return
+        for subscribed in list(subscriptions):
+            if sender is not None and subscribed[0] != sender:
+                continue
+            if service is not None and subscribed[1] != service:
+                continue
+            subscriptions.discard(subscribed)
+            subscribers = self.senders.get(subscribed[0], {}).get(subscribed[1])
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+        if not subscriptions:
+            del self.subscriptions[subscriber]
+
+    def subscribers(self, sender, service):
+        """
+        Returns the live set of subscribers to a service of sender. The
+        returned set should not be modified.
+        """
+        return self.senders.get(sender, {}).get(service, frozenset())
+
+    def is_subscribed(self, subscriber, sender, service):
+        """Returns whether subscriber is subscribed to service of sender."""
+        return (sender, service) in self.subscriptions.get(subscriber, ())
+
+    def msg(self, sender, service, text=None, exclude=None, **kwargs):
+        """
+        Send a message to the subscribers of a service of sender.
+
+        Args:
+            sender (Object): The sender.
+            service (str): The service to send on.
+            text (str or tuple): Message to send.
+            exclude (list, optional): Subscribers not to send to.
+        Kwargs:
+            Keyword arguments will be passed on to the sessions.
+        """
+        subscribers = self.subscribers(sender, service)
+        if subscribers:
+            multicast(subscribers, text, exclude=exclude, **kwargs)
+
+    def check(self):
+        """
+        Run the auto_unsub_checkers over every subscription in one batch.
+        """
+        for sender, checker in list(self.checkers.items()):
+            for service, subscribers in list(self.senders.get(sender, {}).items()):
+                for subscriber in [obj for obj in subscribers
+                                   if checker(sender, obj)]:
+                    self.unsubscribe(subscriber, sender, service)
+        if not self.checkers:
+            self._stop()
+
+    def _start(self):
+        """Start the checking loop if it isn't already running."""
+        if self.ticker is None:
+            from twisted.internet.task import LoopingCall
+            self.ticker = LoopingCall(self.check)
+            self.ticker.start(self.interval, now=False)
+
+    def _stop(self):
+        """Stop the checking loop."""
+        if self.ticker is not None:
+            if self.ticker.running:
+                self.ticker.stop()
+            self.ticker = None
+
+
+SUBSCRIPTIONS = SubscriptionHandler()
+
+# -----------------------------------------------------------------------------
+# Commands
+# -----------------------------------------------------------------------------
+
+
+class CmdWatch(COMMAND_DEFAULT_CLASS):
+    """
+    Follow everything an object is doing.
+
+    Usage:
+        watch <object>
+        listen <object>
+        watch/stop <object>
+        listen/stop <object>
+
+    Watching or listening to an object gets you all of its messages rather
+    than only the ones it shares with the room.
+    """
+    key = "watch"
+    aliases = ["listen"]
+    switch_options = ("stop",)
+    locks = "cmd:all()"
+    help_category = "General"
+
+    def func(self):
+        """Actions undertaken by the Command"""
+        caller = self.caller
+        service = self.cmdstring.lower()
+        if not self.args:
+            caller.msg("Usage: %s[/stop] <object>" % service)
+            return
+
+        sender = caller.search(self.args)
+        if not sender:
+            return
+
+        if "stop" in self.switches:
+            if not SUBSCRIPTIONS.is_subscribed(caller, sender, service):
+                caller.msg("You aren't doing that.")
+                return
+            SUBSCRIPTIONS.unsubscribe(caller, sender, service)
+            caller.msg("You stop paying attention to %s." % sender.key)
+            return
+
+        if not SUBSCRIPTIONS.subscribe(caller, sender, service):
+            caller.msg("You can't %s %s." % (service, sender.key))
+            return
+        caller.msg("You %s %s." % (service, sender.key))
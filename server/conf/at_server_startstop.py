@@ -15,6 +15,9 @@ at_server_cold_start()
 at_server_cold_stop()
 
 """
+import sys
+from features.occupancy import OCCUPANCY
+from features.noise_levels import NOISE
 
 
 def at_server_start():
@@ -22,7 +25,9 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    # Rebuild in-memory indexes from the characters still puppeted.
+    OCCUPANCY.rebuild()
+    NOISE.rebuild()
 
 
 def at_server_stop():
@@ -30,7 +35,12 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    # Write out occupants held back by in-memory Places storage, if Places
+    # are in use at all.
+    places = sys.modules.get("1_testing.places")
+    if places and isinstance(places.PLACE_OCCUPANTS.storage,
+                             places.MemoryStorage):
+        places.PLACE_OCCUPANTS.storage.snapshot()
 
 
 def at_server_reload_start():
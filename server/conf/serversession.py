@@ -19,10 +19,88 @@ settings file:
 
     SERVER_SESSION_CLASS = "server.conf.serversession.ServerSession"
 
+Outbound coalescing:
+A single command in a busy room can send a session many short lines - say,
+place chatter, ambience, combat - each of which is its own message to the
+portal. This ServerSession holds what is sent to it for
+SESSION_COALESCE_WINDOW seconds and then sends it on, merging runs of plain
+text with the same options into one message. Anything else (OOB commands,
+prompts, text with different options) is sent as it was, in order, and
+splits the runs around it.
+
+    SESSION_COALESCE_WINDOW = 0     # Merge within the current reactor tick.
+    SESSION_COALESCE_WINDOW = 0.05  # Hold text up to 50ms.
+    SESSION_COALESCE_WINDOW = None  # Send every message at once.
+
+COALESCE_STATS counts messages received, sends made and messages merged
+across all sessions, and every session keeps the same in coalesce_stats.
+
 """
 
+from django.conf import settings
 from evennia.server.serversession import ServerSession as BaseServerSession
 
+_COALESCE_WINDOW = getattr(settings, "SESSION_COALESCE_WINDOW", None)
+
+COALESCE_STATS = {"messages": 0, "sends": 0, "merged": 0}
+
+
+def _mergeable(kwargs):
+    """
+    Returns (line, key) for a plain text message, where messages with the
+    same key can be merged, or None for anything else.
+    """
+    if set(kwargs) - set(("text", "options")):
+        return None
+    text = kwargs.get("text")
+    if isinstance(text, str):
+        line, textkwargs = text, {}
+    elif (isinstance(text, (tuple, list)) and len(text) == 2
+          and isinstance(text[0], str) and isinstance(text[1], dict)):
+        line, textkwargs = text
+    else:
+        return None
+    options = kwargs.get("options") or {}
+    return line, (sorted(textkwargs.items()), sorted(options.items()))
+
+
+def _merge(first, lines):
+    """Returns the kwargs of first with its text replaced by lines."""
+    if len(lines) == 1:
+        return first
+    kwargs = dict(first)
+    text = "\n".join(lines)
+    kwargs["text"] = text if isinstance(first["text"], str) else (text, first["text"][1])
+    return kwargs
+
+
+def coalesce(buffer):
+    """
+    Merge the runs of mergeable text in buffer, keeping everything in order.
+
+    Args:
+        buffer (list): The kwargs of data_out() calls, oldest first.
+
+    Returns:
+        sends (list): The kwargs to send on, oldest first.
+    """
+    sends, lines, key, first = [], [], None, None
+    for kwargs in buffer:
+        mergeable = _mergeable(kwargs)
+        if mergeable is not None and lines and mergeable[1] == key:
+            lines.append(mergeable[0])
+            continue
+        if lines:
+            sends.append(_merge(first, lines))
+            lines = []
+        if mergeable is None:
+            sends.append(kwargs)
+        else:
+            lines, key, first = [mergeable[0]], mergeable[1], kwargs
+    if lines:
+        sends.append(_merge(first, lines))
+    return sends
+
 
 class ServerSession(BaseServerSession):
     """
@@ -33,4 +111,53 @@ class ServerSession(BaseServerSession):
     to the game server. All communication between game and account goes
     through their session(s).
     """
-    pass
+
+    def data_out(self, **kwargs):
+        """
+        Sending data from Evennia->Client, held for SESSION_COALESCE_WINDOW
+        seconds so it can be merged with what follows.
+        """
+        if _COALESCE_WINDOW is None:
+            return super().data_out(**kwargs)
+
+        buffer = getattr(self, "_coalesce_buffer", None)
+        if buffer is None:
+            buffer = self._coalesce_buffer = []
+        buffer.append(kwargs)
+        if getattr(self, "_coalesce_call", None) is None:
+            from twisted.internet import reactor
+            self._coalesce_call = reactor.callLater(_COALESCE_WINDOW,
+                                                    self.flush_output)
+
+    def flush_output(self):
+        """
+        Send everything held by data_out() now, merged.
+        """
+        call = getattr(self, "_coalesce_call", None)
+        if call is not None and call.active():
+            call.cancel()
+        self._coalesce_call = None
+        buffer = getattr(self, "_coalesce_buffer", None)
+        if not buffer:
+            return
+        self._coalesce_buffer = []
+
+        sends = coalesce(buffer)
+        for kwargs in sends:
+            super().data_out(**kwargs)
+
+        stats = getattr(self, "coalesce_stats", None)
+        if stats is None:
+            stats = self.coalesce_stats = dict.fromkeys(COALESCE_STATS, 0)
+        for counters in (stats, COALESCE_STATS):
+            counters["messages"] += len(buffer)
+            counters["sends"] += len(sends)
+            counters["merged"] += len(buffer) - len(sends)
+
+    def at_disconnect(self, reason=None):
+        """
+        Hook called by sessionhandler at disconnection. Sends anything
+        still held first.
+        """
+        self.flush_output()
+        super().at_disconnect(reason)
@@ -34,6 +34,12 @@ from evennia.settings_default import *
 # This is the name of your game. Make it catchy!
 SERVERNAME = "develop"
 
+# The session class, which coalesces text sent to each session.
+SERVER_SESSION_CLASS = "server.conf.serversession.ServerSession"
+# Merge text sent to a session within this many seconds into one message.
+# 0 merges within the current reactor tick, None sends every message at once.
+SESSION_COALESCE_WINDOW = 0
+
 
 ######################################################################
 # Settings given in secret_settings.py override those in this file.